@@ -1,5 +1,6 @@
 import os
 import logging
+from pymongo import MongoClient
 from motor import motor_asyncio
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from .database_strategy import DatabaseStrategy
@@ -12,6 +13,7 @@ _MESSAGE_HISTORY_KEY = 'conversation_id'
 class MongoStrategy(DatabaseStrategy):
     def __init__(self, url: str):
         self._client = None
+        self._sync_client = None
         self._database_name = os.environ['DATABASE_NAME']
         self._message_history_collection = _MESSAGE_HISTORY_COLLECTION
         self._message_history_key = _MESSAGE_HISTORY_KEY
@@ -25,11 +27,25 @@ class MongoStrategy(DatabaseStrategy):
     async def close(self) -> None:
         """Coroutine to close connection to Mongo database"""
         self._client.close()
+        if self._sync_client is not None:
+            self._sync_client.close()
+            self._sync_client = None
 
     def get_database(self) -> AsyncIOMotorDatabase:
         """Return Mongo database"""
         return self._client.get_database(self._database_name)
     
+    @property
+    def client(self) -> AsyncIOMotorClient:
+        """Shared Motor client, whose connection pool serves every request"""
+        return self._client
+
+    def get_sync_client(self) -> MongoClient:
+        """pymongo client for synchronous chat history access, created on first use"""
+        if self._sync_client is None:
+            self._sync_client = MongoClient(self._url)
+        return self._sync_client
+
     @property
     def name(self):
         return self._database_name
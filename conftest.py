@@ -0,0 +1,19 @@
+import pytest
+from typing import Any, Callable, List
+from langchain_core.documents import Document
+
+class WhitespaceTokenizer:
+    """One token per word"""
+    def encode(self, text: str, add_special_tokens: bool = False) -> list:
+        return text.split()
+
+@pytest.fixture
+def whitespace_tokenizer() -> WhitespaceTokenizer:
+    return WhitespaceTokenizer()
+
+@pytest.fixture
+def documents() -> Callable[..., List[Document]]:
+    """Factory of one document per value, holding the value under `key` in its metadata"""
+    def make(key: str, *values: Any, content: Callable[[Any], str] = lambda value: f'content {value}') -> List[Document]:
+        return [Document(page_content=content(value), metadata={key: value}) for value in values]
+    return make
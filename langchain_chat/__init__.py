@@ -1,7 +1,11 @@
 from .chat_bot import (
     ChatBot,
     ChatBotBuilder,
+    verdict_cache,
+    response_cache,
 )
-from .llm_models import LLM, FACTORIES
+from .llm_models import LLM, FACTORIES, llm_pool
+from .messages import summary_runner, title_runner
+from .task_execution_context import authorization_var
 
-__all__ = ['ChatBot', 'ChatBotBuilder', 'LLM', 'FACTORIES']
\ No newline at end of file
+__all__ = ['ChatBot', 'ChatBotBuilder', 'verdict_cache', 'response_cache', 'LLM', 'FACTORIES', 'llm_pool', 'summary_runner', 'title_runner', 'authorization_var']
\ No newline at end of file
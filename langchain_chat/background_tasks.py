@@ -0,0 +1,48 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable, Set
+from .logger import logger
+
+class BackgroundRunner:
+    """
+    Run fire-and-forget coroutines off the streaming path
+
+    Concurrency is bounded per runner, and a key can only have one task in flight,
+    so repeated submissions for the same conversation are dropped
+    """
+    def __init__(self, name: str, max_concurrency: int):
+        self.name = name
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks: Set[asyncio.Task] = set()
+        self._keys: Set[Hashable] = set()
+
+    def submit(self, key: Hashable, coroutine_function: Callable[[], Awaitable]) -> bool:
+        """Schedule `coroutine_function()`, returning False when `key` is already in flight"""
+        if key in self._keys:
+            return False
+
+        async def run():
+            async with self._semaphore:
+                try:
+                    await coroutine_function()
+                except Exception as e:
+                    logger.warning(f'Background task {self.name} failed for {key}: {e}')
+
+        self._keys.add(key)
+        task = asyncio.create_task(run())
+        self._tasks.add(task)
+
+        def done(task: asyncio.Task) -> None:
+            self._tasks.discard(task)
+            self._keys.discard(key)
+
+        task.add_done_callback(done)
+        return True
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    async def aclose(self) -> None:
+        """Cancel tasks still in flight"""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
\ No newline at end of file
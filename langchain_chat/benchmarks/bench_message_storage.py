@@ -0,0 +1,69 @@
+"""
+Compare the legacy JSON-string message document with the native BSON one
+
+Run as a module of the application package, from the directory holding `orchestrators`,
+with the environment the application imports under (REDIS_URL):
+    python -m orchestrators.chat.langchain_chat.benchmarks.bench_message_storage
+"""
+import json
+import timeit
+import datetime as dt
+import bson
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, message_to_dict, messages_from_dict
+from ..messages import message_codec as codec
+
+_NUM_MESSAGES = 200
+
+_REPEAT = 20
+
+def conversation(n: int):
+    messages = [SystemMessage('You are an assistant for question-answering tasks.', additional_kwargs={'preprompt': True})]
+    for i in range(n // 2):
+        messages.append(HumanMessage(f'Question {i}: how were GAAP earnings per diluted share in quarter {i}?'))
+        messages.append(AIMessage(f'Answer {i}: ' + 'GAAP earnings per diluted share were $0.67, up 843% year over year. ' * 4))
+    return messages
+
+def legacy_document(message, now):
+    return {
+        'conversation_id': bson.ObjectId(),
+        'History': json.dumps(message_to_dict(message)),
+        'createdAt': now,
+        'updatedAt': now,
+        'type': message.type,
+        'content': message.content,
+    }
+
+def native_document(message, now):
+    return {
+        'conversation_id': bson.ObjectId(),
+        **codec.to_document(message),
+        'createdAt': now,
+        'updatedAt': now,
+    }
+
+def main():
+    now = dt.datetime.now(dt.timezone.utc)
+    messages = conversation(_NUM_MESSAGES)
+    legacy = [bson.encode(legacy_document(message, now)) for message in messages]
+    native = [bson.encode(native_document(message, now)) for message in messages]
+
+    def decode_legacy():
+        documents = [bson.decode(raw) for raw in legacy]
+        return messages_from_dict([json.loads(document['History']) for document in documents])
+
+    def decode_native():
+        return codec.from_documents([bson.decode(raw) for raw in native])
+
+    assert [m.content for m in decode_legacy()] == [m.content for m in decode_native()]
+
+    legacy_time = min(timeit.repeat(decode_legacy, number=1, repeat=_REPEAT))
+    native_time = min(timeit.repeat(decode_native, number=1, repeat=_REPEAT))
+    legacy_size = sum(len(raw) for raw in legacy)
+    native_size = sum(len(raw) for raw in native)
+
+    print(f'{len(messages)} messages')
+    print(f'document bytes  legacy {legacy_size:>10}  native {native_size:>10}  saved {1 - native_size / legacy_size:.1%}')
+    print(f'decode ms       legacy {legacy_time * 1e3:>10.2f}  native {native_time * 1e3:>10.2f}  saved {1 - native_time / legacy_time:.1%}')
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
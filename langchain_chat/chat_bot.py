@@ -3,12 +3,13 @@ from __future__ import annotations
 import os
 import json
 import re
+import asyncio
+import hashlib
 from collections import deque
 from typing import Callable, AsyncGenerator, Optional, List, Any, Dict
 
-from pymongo import DESCENDING
 from langchain_core.runnables import (
-    Runnable, RunnablePassthrough, RunnableLambda, RunnableParallel, RunnableBranch)
+    Runnable, RunnablePassthrough, RunnableLambda, RunnableBranch)
 from langchain_core.language_models import LanguageModelLike
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.output_parsers.string import StrOutputParser
@@ -25,11 +26,15 @@ from langchain_core.prompts import format_document
 
 from .abstract_bot import AbstractBot
 from .llm_models import LLM, ModelProxy as LLMProxy
-from .messages.prompts import registry
+from .messages.prompts import registry, template
+from .messages import message_codec
 from .messages import (
-    MongoMessageHistorySchema, MongoMessageHistory, SystemMessage, 
-    HumanMessage, AIMessage, BaseMessage, Sequence)
+    MongoMessageHistorySchema, MongoMessageHistory, GatedChatMessageHistory, SystemMessage, 
+    HumanMessage, AIMessage, BaseMessage, Sequence, SummaryMemory, summary_runner,
+    ConversationTitle, title_runner)
 
+from .verdict_cache import VerdictCache
+from .response_cache import ResponseCache, CachedChatModel
 from .task_execution_context import session_id_var
 from .logger import logger
 
@@ -40,8 +45,10 @@ try:
         create_filter_expression,
         AbstractVectorStore,
         AbstractVectorRetriever,
+        MultiSourceRetriever,
         STORE_FACTORIES, 
         RETRIEVER_FACTORIES,
+        aconnect_redis,
     )
 except ImportError:
     raise ImportError('package `langchain_doc` is a prerequisite of package `langchain_chat`')
@@ -55,6 +62,48 @@ if NLP_HARMONY:
             '`NLP_HARMONY` is set to true, but the `langchain_harmony` package is not installed'
         )
 
+# title conversations from their key phrases, falling back to the LLM titler when none stand out
+EXTRACTIVE_TITLES = os.getenv('EXTRACTIVE_TITLES', 'false').lower() == 'true'
+if EXTRACTIVE_TITLES:
+    try:
+        from ..langchain_harmony import extract_title
+    except ImportError:
+        raise ImportError(
+            '`EXTRACTIVE_TITLES` is set to true, but the `langchain_harmony` package is not installed'
+        )
+
+# TGI rejects requests whose input plus max_new_tokens exceed its --max-total-tokens
+MAX_TOTAL_TOKENS = int(os.getenv('MAX_TOTAL_TOKENS', 8192))
+
+# chat template tokens per message and template text around the history
+_MESSAGE_TOKEN_OVERHEAD = 4
+_TEMPLATE_TOKEN_RESERVE = 128
+
+# fold older turns into a running summary once history outgrows part of the budget
+SUMMARY_MEMORY = os.getenv('SUMMARY_MEMORY', 'true').lower() == 'true'
+_SUMMARY_MAX_NEW_TOKENS = int(os.getenv('SUMMARY_MAX_NEW_TOKENS', 512))
+
+# run the guardrail verdict alongside retrieval and generation, holding back up to
+# GUARDRAILS_BUFFER_TOKENS answer tokens until it arrives
+OPTIMISTIC_GUARDRAILS = os.getenv('OPTIMISTIC_GUARDRAILS', 'false').lower() == 'true'
+_GUARDRAILS_BUFFER_TOKENS = int(os.getenv('GUARDRAILS_BUFFER_TOKENS', 256))
+
+# reuse verdicts for resent or trivially rephrased prompts, shared by workers through Redis
+GUARDRAILS_CACHE = os.getenv('GUARDRAILS_CACHE', 'true').lower() == 'true'
+
+verdict_cache = VerdictCache(aconnect_redis)
+
+# replay answers to identical rendered prompts of deterministic models, per user
+RESPONSE_CACHE = os.getenv('RESPONSE_CACHE', 'false').lower() == 'true'
+
+response_cache = ResponseCache(aconnect_redis)
+
+# answer a conversation's first question from answers to similar first questions on the same documents
+SEMANTIC_CACHE = os.getenv('SEMANTIC_CACHE', 'false').lower() == 'true'
+
+# chain topologies by name, compiled on first use, see `ChatBot.compiled_chain`
+_COMPILED_CHAINS: Dict[str, Runnable] = {}
+
 class ChatBot(AbstractBot):
     def __init__(self):
         """Composite parts"""
@@ -63,15 +112,39 @@ class ChatBot(AbstractBot):
         self.guardrails_part: ChatBotBuilder.GuardrailsPart = None
         self.prompt_part: ChatBotBuilder.PromptPart = None
         self.message_part: ChatBotBuilder.MessagePart = None
+        # guardrail verdict of the turn while it runs alongside generation, see `aapproved`
+        self.verdict: Optional[asyncio.Task] = None
 
-    def _trace_history_chain(self) -> None:
-        def _historic_messages_by(n: int) -> List[BaseMessage]:
-            messages = self.message_part.message_history.messages[-n:]
+    async def _atrace_history_chain(self) -> None:
+        async def _historic_messages_by(n: int) -> List[BaseMessage]:
+            messages = (await self.message_part.message_history.aget_messages())[-n:]
             logger.info(f'Message History {messages}')
             return messages
         runnable = RunnableLambda(
             _historic_messages_by).with_config(run_name='trace_my_history')
-        runnable.invoke(20)
+        await runnable.ainvoke(20)
+
+    @staticmethod
+    def configured(key: str) -> Runnable:
+        """Node running the runnable passed at invocation under `configurable[key]`"""
+        def select(input_data: Any, config: RunnableConfig) -> Runnable:
+            return config['configurable'][key]
+
+        async def aselect(input_data: Any, config: RunnableConfig) -> Runnable:
+            return config['configurable'][key]
+
+        return RunnableLambda(select, afunc=aselect, name=key)
+
+    @staticmethod
+    def prompt(name: str, with_preprompt: bool = False) -> Runnable:
+        """Node running a registered template, built once per preprompt passed in `configurable`"""
+        def select(input_data: Any, config: RunnableConfig) -> Runnable:
+            return template(name, config['configurable']['preprompt']) if with_preprompt else template(name)
+
+        async def aselect(input_data: Any, config: RunnableConfig) -> Runnable:
+            return select(input_data, config)
+
+        return RunnableLambda(select, afunc=aselect, name=name)
 
     @staticmethod
     def preprompt_filter() -> RunnableLambda:
@@ -86,8 +159,56 @@ class ChatBot(AbstractBot):
         
         return RunnableLambda(create_preprompt_filter).with_config(run_name='filter_preprompt_chain')
 
+    @staticmethod
+    def history_trimmer() -> RunnableLambda:
+        """Fit chat history into the model's input token budget, pinning the preprompt and keeping the latest turns"""
+        def trim_history(input_data: Dict[str, Any], config: RunnableConfig) -> Dict[str, Any]:
+            history = input_data.get('chat_history', [])
+            if not history:
+                return input_data
+
+            configurable = config['configurable']
+            tokenizer = configurable['tokenizer']
+
+            def count_tokens(text: Any) -> int:
+                return len(tokenizer.encode(text if isinstance(text, str) else str(text), add_special_tokens=False))
+
+            def is_pinned(message: BaseMessage) -> bool:
+                return isinstance(message, SystemMessage) and (
+                    message.additional_kwargs.get('preprompt', False) or message.additional_kwargs.get('summary', False))
+
+            pinned = [message for message in history if is_pinned(message)]
+            context = input_data.get('context', '')
+            if isinstance(context, list):
+                context = DEFAULT_DOCUMENT_SEPARATOR.join(doc.page_content for doc in context)
+
+            used = _TEMPLATE_TOKEN_RESERVE + count_tokens(configurable['preprompt']) \
+                + count_tokens(input_data.get('input', '')) + count_tokens(context) \
+                + sum(count_tokens(message.content) + _MESSAGE_TOKEN_OVERHEAD for message in pinned)
+            remaining = configurable['input_token_budget'] - used
+
+            kept = deque()
+            for message in reversed(history):
+                if is_pinned(message):
+                    continue
+                remaining -= count_tokens(message.content) + _MESSAGE_TOKEN_OVERHEAD
+                if remaining < 0:
+                    break
+                kept.appendleft(message)
+
+            # never open the window on an orphaned ai reply
+            while kept and not isinstance(kept[0], HumanMessage):
+                kept.popleft()
+
+            if len(kept) + len(pinned) < len(history):
+                logger.info(f'Trimmed chat history from {len(history)} to {len(kept) + len(pinned)} messages')
+
+            return {**input_data, 'chat_history': [*pinned, *kept]}
+
+        return RunnableLambda(trim_history).with_config(run_name='trim_history_chain')
+
+    @staticmethod
     def create_history_aware_retriever(
-        self,
         llm: LanguageModelLike,
         retriever: RetrieverLike,
         prompt: BasePromptTemplate,
@@ -112,8 +233,8 @@ class ChatBot(AbstractBot):
         
         return retrieve_documents
     
+    @staticmethod
     def create_stuff_documents_chain(
-        self,
         llm: LanguageModelLike,
         prompt: BasePromptTemplate,
         preprompt_filter: Optional[Runnable] = None,
@@ -133,28 +254,28 @@ class ChatBot(AbstractBot):
             | StrOutputParser()
         ).with_config(run_name='stuff_documents_chain')    
 
-    def create_chain(self, llm: BaseChatModel) -> Runnable:
-        chain = self.prompt_part.registry['chat_preprompt_template'](self.prompt_part.user_prompt) | llm
+    @classmethod
+    def create_chain(cls, llm: Runnable) -> Runnable:
+        chain = cls.history_trimmer() | cls.prompt('chat_preprompt_template', True) | llm
         return chain.with_config(run_name='prompt_llm_chain')
 
-    def create_context_aware_chain(self, llm: BaseChatModel, source_retriever: AbstractVectorRetriever) -> Runnable:
+    @classmethod
+    def create_context_aware_chain(cls, llm: Runnable, retriever: Runnable) -> Runnable:
         """ """
-        history_aware_retriever = self.create_history_aware_retriever(
+        history_aware_retriever = cls.create_history_aware_retriever(
             llm,
-            source_retriever.retriever,
-            self.prompt_part.registry['contextualized_template'](),
-            preprompt_filter=self.preprompt_filter())
-        question_answer_chain = self.create_stuff_documents_chain(
+            retriever,
+            cls.prompt('contextualized_template'),
+            preprompt_filter=cls.preprompt_filter() | cls.history_trimmer())
+        question_answer_chain = cls.create_stuff_documents_chain(
             llm, 
-            self.prompt_part.registry['qa_template'](self.prompt_part.user_prompt),
-            preprompt_filter=self.preprompt_filter())
+            cls.prompt('qa_template', True),
+            preprompt_filter=cls.preprompt_filter() | cls.history_trimmer())
         return create_retrieval_chain(history_aware_retriever, question_answer_chain)
 
-    def create_multi_retriever_chain(self, llm: BaseChatModel, source_retrievers: List[AbstractVectorRetriever]) -> Runnable:
-        context_prompt = self.prompt_part.registry['contextualized_template']()
-        retriever_map = {f'Source {source_retriever.source}': source_retriever.retriever for source_retriever in source_retrievers}
-        parallel_retrieval = RunnableParallel(retriever_map)
-
+    @classmethod
+    def create_multi_retriever_chain(cls, llm: Runnable, retriever: Runnable) -> Runnable:
+        """`retriever` maps a query to documents per source, as `MultiSourceRetriever` does"""
         def combine_contexts(retrieved_results: dict, separator=DEFAULT_DOCUMENT_SEPARATOR) -> list:
             combined_results = []
             for key, docs in retrieved_results.items():
@@ -168,25 +289,25 @@ class ChatBot(AbstractBot):
         combine_contexts_runnable = RunnableLambda(combine_contexts) \
             .with_config(run_name='combine_context_chain')
 
-        retrieve_documents = self.create_history_aware_retriever(
+        retrieve_documents = cls.create_history_aware_retriever(
             llm,
-            parallel_retrieval,
-            context_prompt,
-            preprompt_filter=self.preprompt_filter())
+            retriever,
+            cls.prompt('contextualized_template'),
+            preprompt_filter=cls.preprompt_filter() | cls.history_trimmer())
 
         return retrieve_documents | combine_contexts_runnable
     
-    def create_multi_stuff_chain(self, llm: BaseChatModel) -> Runnable:
-        qa_template = self.prompt_part.registry['qa_template'](self.prompt_part.user_prompt)
-
-        return self.create_stuff_documents_chain(
+    @classmethod
+    def create_multi_stuff_chain(cls, llm: Runnable) -> Runnable:
+        return cls.create_stuff_documents_chain(
             llm,
-            qa_template,
-            preprompt_filter=self.preprompt_filter())      
+            cls.prompt('qa_template', True),
+            preprompt_filter=cls.preprompt_filter() | cls.history_trimmer())      
 
-    def create_multicontext_aware_chain(self, llm: BaseChatModel, source_retrievers: List[AbstractVectorRetriever]):
-        multi_retriever_chain = self.create_multi_retriever_chain(llm, source_retrievers)
-        stuffing_chain = self.create_multi_stuff_chain(llm)
+    @classmethod
+    def create_multicontext_aware_chain(cls, llm: Runnable, retriever: Runnable):
+        multi_retriever_chain = cls.create_multi_retriever_chain(llm, retriever)
+        stuffing_chain = cls.create_multi_stuff_chain(llm)
         
         multicontext_aware_chain = (
             RunnablePassthrough.assign(
@@ -196,81 +317,148 @@ class ChatBot(AbstractBot):
 
         return multicontext_aware_chain
 
+    @classmethod
+    def compiled_chain(cls, topology: str) -> Runnable:
+        """
+        Chain with history and listeners for `chat`, `rag` or `multi_rag`, built once per process
+
+        The model, retriever, preprompt, history and bot vary per request and are read from
+        `configurable`, see `chain_config`.
+        """
+        if (chain := _COMPILED_CHAINS.get(topology)) is not None:
+            return chain
+
+        llm, retriever = cls.configured('llm'), cls.configured('retriever')
+        match topology:
+            case 'chat':
+                chain = cls.create_chain(llm)
+            case 'rag':
+                chain = cls.create_context_aware_chain(llm, retriever)
+            case 'multi_rag':
+                chain = cls.create_multicontext_aware_chain(llm, retriever)
+            case _:
+                raise ValueError(f'Unknown chain topology {topology}')
+
+        async def aenter_chat_chain(run: Run, config: RunnableConfig) -> None:
+            await config['configurable']['chat_bot']._aenter_chat_chain(run, config)
+
+        async def aexit_chat_chain(run: Run, config: RunnableConfig) -> None:
+            await config['configurable']['chat_bot']._aexit_chat_chain(run, config)
+
+        chain_with_history = MongoMessageHistory.configurable(chain, topology != 'chat').with_alisteners(
+            on_start=aenter_chat_chain,
+            on_end=aexit_chat_chain)
+        return _COMPILED_CHAINS.setdefault(topology, chain_with_history)
+
+    def cached_llm(self, chat_llm: BaseChatModel) -> Runnable:
+        """
+        The chat model behind the response cache when enabled and generation is deterministic
+
+        Answers are scoped to the user; a turn without one is not cached rather than shared.
+        """
+        parameters = self.llm_part.llm.parameters
+        if not RESPONSE_CACHE or parameters.get('do_sample'):
+            return chat_llm
+
+        if (user := self.vector_part.metadata.get('uuid')) is None:
+            logger.warning('Response cache skipped, the turn has no user to scope it to')
+            return chat_llm
+
+        model = f'{self.llm_part.llm.name}:{json.dumps(parameters, sort_keys=True, default=str)}'
+        return response_cache.wrap(chat_llm, model, f'user:{user}', self.aapproved)
+
+    def chain_config(self, chat_llm: BaseChatModel, retriever: Optional[Runnable] = None) -> dict:
+        """Per-request parameters of a compiled chain"""
+        message_history = self.message_part.message_history.chat_message_history
+        if self.verdict is not None:
+            message_history = GatedChatMessageHistory(message_history, self.aapproved)
+        return {
+            'configurable': {
+                **self.message_part.configurable,
+                'chat_bot': self,
+                'message_history': message_history,
+                'llm': self.cached_llm(chat_llm),
+                'retriever': retriever,
+                'preprompt': self.prompt_part.user_prompt,
+                'tokenizer': chat_llm.tokenizer,
+                'input_token_budget': self.llm_part.input_token_budget,
+            }
+        }
+
     async def _aenter_chat_chain(self, run: Run, config: RunnableConfig) -> Optional[SystemMessage]:
         """On start runnable listener"""
         collection = self.message_part.message_history.chat_message_history.collection
         
-        document = collection.find_one({
+        document = await collection.find_one({
             'type': 'system', 
             'content': self.prompt_part.user_prompt, 
             self.message_part.message_schema.session_id_key: config['configurable']['session_id'],
         })
         
-        if document is None:
-            await self.message_part.aadd_system_message(self.prompt_part.user_prompt, additional_kwargs={'preprompt': True})
+        if document is not None and message_codec.additional_kwargs(document).get('preprompt', False):
+            return
+
+        history = config['configurable'].get('message_history')
+        if isinstance(history, GatedChatMessageHistory):
+            # written ahead of the turn once the verdict approves it
+            history.defer([SystemMessage(self.prompt_part.user_prompt, additional_kwargs={'preprompt': True})])
         else:
-            history_data = json.loads(document['History'])
-            
-            additional_kwargs = history_data.get('data', {}).get('additional_kwargs', {})
-            if not additional_kwargs.get('preprompt', False):
-                await self.message_part.aadd_system_message(self.prompt_part.user_prompt, additional_kwargs={'preprompt': True})
+            await self.message_part.aadd_system_message(self.prompt_part.user_prompt, additional_kwargs={'preprompt': True})
 
     async def _aexit_chat_chain(self, run: Run, config: RunnableConfig) -> None:
-        """On end runnable listener"""
-        collection = self.message_part.message_history.chat_message_history.collection
-        if(
-            ai_message := collection.find_one(
-                {
-                    'type': { '$in': ['ai', 'AIMessageChunk'] }, 
-                    self.message_part.message_schema.session_id_key: config['configurable']['session_id'],
-                }, 
-                sort=[("createdAt", DESCENDING)])
-        ) is not None:
-            chain = self.prompt_part.registry['summarization_template']() | self.llm_part.llm.summary_object
-            summary = await chain.ainvoke({'input': ai_message['content']})
-            self.message_part.message_history.chat_message_history.add_summary(summary.content)
+        """On end runnable listener, schedules conversation upkeep off the response path"""
+        if not await self.aapproved():
+            return
+
+        session_id = config['configurable']['session_id']
+        title_runner.submit(session_id, self.conversation_title().arefresh)
+
+        if SUMMARY_MEMORY:
+            summary_runner.submit(session_id, self.summary_memory().acompact)
+
+    def conversation_title(self) -> ConversationTitle:
+        """Title generator for this conversation"""
+        chain = self.prompt_part.registry['summarization_template']() | self.llm_part.llm.summary_object
+        return ConversationTitle(
+            self.message_part.message_history.chat_message_history,
+            chain,
+            extractor=extract_title if EXTRACTIVE_TITLES else None)
+
+    def summary_memory(self) -> SummaryMemory:
+        """Compactor folding this conversation's older turns into its running summary"""
+        endpoint_object = self.llm_part.llm.endpoint_object
+        tokenizer = endpoint_object.tokenizer
+        budget = self.llm_part.input_token_budget
+        return SummaryMemory(
+            self.message_part.message_history.chat_message_history,
+            endpoint_object.bind(max_new_tokens=_SUMMARY_MAX_NEW_TOKENS),
+            self.prompt_part.registry['conversation_summary_template'](),
+            lambda text: len(tokenizer.encode(text, add_special_tokens=False)) + _MESSAGE_TOKEN_OVERHEAD,
+            trigger_tokens=budget // 2,
+            keep_tokens=budget // 4,
+        )
     
     def format_cancel_message(self):
         pattern = r"<BEGIN UNSAFE CONTENT CATEGORIES>(.*?)<END UNSAFE CONTENT CATEGORIES>"
-        match = re.search(pattern, self.prompt_part.registry['guardrails_template']().template, re.DOTALL)
+        match = re.search(pattern, template('guardrails_template').template, re.DOTALL)
         content = 'Some of the content in your prompt falls under standardized hazards taxonomy.\n'
         content += 'Please review the following hazard categories:\n\n'
         content += match.group(1).strip()
         return content
     
-    async def calculate_vecs(self, message: str) -> bool:
+    async def fetch_retrievers(self) -> List[AbstractVectorRetriever]:
+        """Retrievers for this turn, routed on the ingest metadata instead of probing the vector store"""
         if self.vector_part.source_retrievers:
-            from langchain_core.callbacks.base import AsyncCallbackHandler
-            class ProcessDocumentsCallback(AsyncCallbackHandler):
-                async def on_retriever_end(self, documents: List[Document], **kwargs: Any) -> None:
-                    n = 2
-                    num_steps = 4
-                    indices = [n**i for i in range(1, num_steps + 1) if n**i < len(documents)]
-                    retrieved_docs = [documents[i] for i in indices]
-                    logger.info(f'retrieved docs subset {retrieved_docs}')
-
-            import random
-            source_retriever = random.choice(self.vector_part.source_retrievers)
-            docs = await source_retriever.retriever.ainvoke(
-                message,
-                config={
-                    'callbacks': [ProcessDocumentsCallback()]
-                }
-            )
-            return len(docs) > 0
+            return self.vector_part.source_retrievers
 
-        return await self.vector_part.aavailable_vectors(message)
-    
-    async def fetch_retrievers(self, message: str) -> List[AbstractVectorRetriever]:
-        if len(self.vector_part.source_retrievers) >= 1:
-            await self.vector_part.inspect(message)
+        history = self.message_part.message_history.chat_message_history
+        if (sources := await history.avector_sources()) is None:
+            sources = await history.abackfill_vector_sources(
+                self.vector_part.ahas_vectors, self.vector_part.vector_store.ttl_seconds)
 
-        source_retrievers = self.vector_part.source_retrievers or [self.vector_part.no_doc_retriever]
-        return source_retrievers
+        return [self.vector_part.source_retriever(source) for source in sources]
 
     async def cancel_astream(self) -> Callable[[], AsyncGenerator[str, None]]:
-        import asyncio
-
         def stream_chunks(message: str, chunk_size: int = 10):
             for i in range(0, len(message), chunk_size):
                 yield message[i:i + chunk_size]
@@ -282,6 +470,64 @@ class ChatBot(AbstractBot):
 
         return llm_astream
 
+    async def aapproved(self) -> bool:
+        """
+        Whether the turn may be persisted, waiting for a verdict still running alongside generation
+
+        A verdict cancelled by a client disconnect, or failed, never approves the turn.
+        """
+        if self.verdict is None:
+            return True
+        try:
+            return await asyncio.shield(self.verdict)
+        except asyncio.CancelledError:
+            if not self.verdict.cancelled():
+                raise
+        except Exception as e:
+            logger.warning(f'Guardrail verdict failed, the turn is not persisted: {e}')
+        return False
+
+    async def guarded_astream(
+        self,
+        llm_astream: Callable[[], AsyncGenerator[str, None]],
+        verdict: asyncio.Task,
+    ) -> Callable[[], AsyncGenerator[str, None]]:
+        """
+        Generate into a bounded buffer, released once the verdict is safe and discarded otherwise
+
+        A short answer can finish generating before the verdict arrives; its history write,
+        upkeep jobs and cache entries wait on `aapproved`, so an unsafe turn leaves no trace.
+        """
+        async def guarded_llm_astream() -> AsyncGenerator[str, None]:
+            buffer = asyncio.Queue(maxsize=_GUARDRAILS_BUFFER_TOKENS)
+
+            async def produce() -> None:
+                try:
+                    async for token in llm_astream():
+                        await buffer.put(token)
+                except Exception as e:
+                    await buffer.put(e)
+                    return
+                await buffer.put(None)
+
+            producer = asyncio.create_task(produce())
+            try:
+                if not await verdict:
+                    producer.cancel()
+                    async for chunk in (await self.cancel_astream())():
+                        yield chunk
+                    return
+
+                while (token := await buffer.get()) is not None:
+                    if isinstance(token, Exception):
+                        raise token
+                    yield token
+            finally:
+                verdict.cancel()
+                producer.cancel()
+
+        return guarded_llm_astream
+
     async def generate_llm_astream(
         self,
         chain_with_history: RunnableWithMessageHistory,
@@ -323,23 +569,59 @@ class ChatBot(AbstractBot):
         self, 
         chat_llm: BaseChatModel, 
         message: str,
-        source_retrievers: List[AbstractVectorRetriever]
+        source_retrievers: List[AbstractVectorRetriever],
+        semantic_scope: Optional[str] = None,
     ) -> Callable[[], AsyncGenerator[str, None]]:
         if len(source_retrievers) > 1:
-            chain = self.create_multicontext_aware_chain(chat_llm, source_retrievers)
+            chain_with_history = self.compiled_chain('multi_rag')
+            # one query embedding shared by the per-source searches
+            retriever = MultiSourceRetriever(source_retrievers=source_retrievers).retriever
         else:
-            chain = self.create_context_aware_chain(chat_llm, source_retrievers[0])
-
-        chain_with_history = self.message_part.message_history.get(chain, True)
-        chain_with_history = chain_with_history.with_alisteners(
-            on_start=self._aenter_chat_chain,
-            on_end=self._aexit_chat_chain)
-        config = self.message_part.runnable_config
+            chain_with_history = self.compiled_chain('rag')
+            retriever = source_retrievers[0].retriever
+        config = self.chain_config(chat_llm, retriever)
 
         async def llm_astream():
+            tokens = []
             async for token in self.generate_llm_astream(chain_with_history, message, config):
+                tokens.append(token)
                 yield token
 
+            if semantic_scope is not None and tokens and tokens[-1] != '<|model_error|>' and await self.aapproved():
+                await self.vector_part.vector_store.semantic_cache.astore(message, semantic_scope, ''.join(tokens))
+
+        return llm_astream
+
+    async def semantic_scope(self) -> Optional[str]:
+        """
+        Semantic cache scope of a standalone question, the hash of the model, its generation
+        parameters, the preprompt and the conversation's documents
+        """
+        history = self.message_part.message_history.chat_message_history
+        if await history.arecent_documents(1, ('human',)):
+            return None
+
+        if not (digests := await history.asource_digests()):
+            return None
+        preprompt = hashlib.sha256(self.prompt_part.user_prompt.encode('utf-8')).hexdigest()
+        parameters = json.dumps(self.llm_part.llm.parameters, sort_keys=True, default=str)
+        scope = [self.llm_part.llm.name, parameters, preprompt, *sorted(digests)]
+        return hashlib.sha256('\0'.join(scope).encode('utf-8')).hexdigest()
+
+    async def replay_astream(self, message: str, answer: str) -> Callable[[], AsyncGenerator[str, None]]:
+        """Stream a cached answer and record the exchange as the chain would"""
+        config = {'configurable': self.message_part.configurable}
+
+        async def llm_astream() -> AsyncGenerator[str, None]:
+            for token in CachedChatModel.replay(answer):
+                yield token
+
+            if not await self.aapproved():
+                return
+            await self._aenter_chat_chain(None, config)
+            await self.message_part.aadd_bulk_messages([HumanMessage(message), AIMessage(answer)])
+            await self._aexit_chat_chain(None, config)
+
         return llm_astream
 
     async def chat_astream(
@@ -347,12 +629,8 @@ class ChatBot(AbstractBot):
         chat_llm: BaseChatModel, 
         message: str
     ) -> Callable[[], AsyncGenerator[str, None]]:
-        chain = self.create_chain(chat_llm)
-        chain_with_history = self.message_part.message_history.get(chain, False)
-        chain_with_history = chain_with_history.with_alisteners(
-            on_start=self._aenter_chat_chain,
-            on_end=self._aexit_chat_chain)
-        config = self.message_part.runnable_config
+        chain_with_history = self.compiled_chain('chat')
+        config = self.chain_config(chat_llm)
 
         async def llm_astream():
             async for token in self.generate_llm_astream(chain_with_history, message, config):
@@ -360,21 +638,37 @@ class ChatBot(AbstractBot):
 
         return llm_astream
     
-    # TODO: add trimmer runnable  
     async def astream(self, message: str) -> Callable[[], AsyncGenerator[str, None]]:
-        self._trace_history_chain()
+        await self._atrace_history_chain()
 
+        verdict = None
         if self.guardrails_part.llm:
-            is_safe = await self.guardrails_part.content_safe(
+            content_safe = self.guardrails_part.content_safe(
                 message, 
-                self.prompt_part.registry['guardrails_template']())
-            if not is_safe:
+                template('guardrails_template'))
+            if OPTIMISTIC_GUARDRAILS:
+                self.verdict = verdict = asyncio.create_task(content_safe)
+            elif not await content_safe:
                 return await self.cancel_astream()
             
         chat_llm = self.llm_part.llm.endpoint_object
-        rag_chain = await self.calculate_vecs(message)
+        try:
+            source_retrievers = await self.fetch_retrievers()
+            semantic_cache = self.vector_part.vector_store.semantic_cache if SEMANTIC_CACHE and source_retrievers else None
+            semantic_scope = await self.semantic_scope() if semantic_cache is not None else None
+
+            if semantic_scope is not None and (answer := await semantic_cache.alookup(message, semantic_scope)) is not None:
+                llm_astream = await self.replay_astream(message, answer)
+            elif source_retrievers:
+                llm_astream = await self.rag_astream(chat_llm, message, source_retrievers, semantic_scope)
+            else:
+                llm_astream = await self.chat_astream(chat_llm, message)
+        except BaseException:
+            if verdict is not None:
+                verdict.cancel()
+            raise
 
-        return await self.rag_astream(chat_llm, message, await self.fetch_retrievers(message)) if rag_chain else await self.chat_astream(chat_llm, message)
+        return llm_astream if verdict is None else await self.guarded_astream(llm_astream, verdict)
 
     chat = astream
 
@@ -396,30 +690,27 @@ class ChatBotBuilder:
             
             self.store = store
             self.metadata = metadata
-            vector_store_schema = json.loads(os.environ['VECTOR_STORE_SCHEMA'])
-            self.filter = create_filter_expression(vector_store_schema, self.metadata)
+            self.vector_store_schema = json.loads(os.environ['VECTOR_STORE_SCHEMA'])
+            self.filter = create_filter_expression(self.vector_store_schema, self.metadata)
             self.embeddings = EmbeddingsProxy(embeddings).get()
             self.vector_store: AbstractVectorStore = STORE_FACTORIES[store](
-                vector_store_schema, self.embeddings)
+                self.vector_store_schema, self.embeddings)
             self.source_retrievers = source_retrievers
             chat_bot.vector_part = self
-    
-        async def aavailable_vectors(self, context) -> bool:
-            """Async Available Vector Search"""
-            vectors = await self.vector_store.asimilarity_search(context, filter=self.filter)
-            count = len(vectors)
-            return count > 0
-        
-        @property
-        def no_doc_retriever(self) -> AbstractVectorRetriever:
+
+        def source_retriever(self, source: str) -> AbstractVectorRetriever:
+            """Retriever of one source ingested into the conversation in an earlier turn"""
+            metadata = {**self.metadata, 'source': source}
             return RETRIEVER_FACTORIES[self.store](
-                filter=self.filter,
+                filter=create_filter_expression(self.vector_store_schema, metadata),
                 vector_store_proxy=self.vector_store,
-                metadata=self.metadata,
+                metadata=metadata,
             )
 
-        async def inspect(self, context) -> str:
-            return await self.vector_store.inspect(context, filter=self.filter)
+        async def ahas_vectors(self) -> bool:
+            """Probe the vector store for any vectors of the conversation"""
+            shard = self.vector_store.shard_for(self.metadata)
+            return await self.vector_store.acount(self.filter, shard) > 0
 
     class LLMPart:
         def __init__(
@@ -430,6 +721,15 @@ class ChatBotBuilder:
             self.llm = LLMProxy(llm).get()
             chat_bot.llm_part = self
 
+        @property
+        def input_token_budget(self) -> int:
+            """Prompt tokens available, bounded by TGI's `truncate` and the room left for `max_new_tokens`"""
+            parameters = self.llm.parameters
+            budget = MAX_TOTAL_TOKENS - (parameters.get('max_new_tokens') or 0)
+            if truncate := parameters.get('truncate'):
+                budget = min(budget, truncate)
+            return budget
+
     class GuardrailsPart:
         def __init__(
             self, 
@@ -440,11 +740,17 @@ class ChatBotBuilder:
             chat_bot.guardrails_part = self
 
         async def content_safe(self, message: str, prompt: BasePromptTemplate) -> bool:
+            if GUARDRAILS_CACHE and (verdict := await verdict_cache.aget(self.llm.name, message, prompt.template)) is not None:
+                return verdict
+
             endpoint_object: BaseChatModel = self.llm.endpoint_object
             chain = prompt | endpoint_object
 
             response = await chain.ainvoke({'input': message, 'agent_type': 'user'})
-            return response.content.strip() == 'safe'
+            verdict = response.content.strip() == 'safe'
+            if GUARDRAILS_CACHE:
+                await verdict_cache.aput(self.llm.name, message, verdict, prompt.template)
+            return verdict
 
     class PromptPart:
         def __init__(
@@ -478,11 +784,6 @@ class ChatBotBuilder:
                 'configurable': self.configurable
             }
 
-        def add_system_message(self, message: str, **kwargs: Any) -> SystemMessage:
-            """Add system message to data store"""
-            system_message = self.message_history.system(message, **kwargs)
-            return system_message
-        
         async def aadd_system_message(self, message: str, **kwargs: Any) -> SystemMessage:
             """Add system message to data store"""
             system_message = await self.message_history.asystem(message, **kwargs)
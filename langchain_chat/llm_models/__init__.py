@@ -1,5 +1,6 @@
 from .factories import FACTORIES
 from .llm import LLM
 from .model_proxy import ModelProxy
+from .llm_pool import LLMPool, llm_pool
 
-__all__ = ['FACTORIES', 'LLM', 'ModelProxy']
\ No newline at end of file
+__all__ = ['FACTORIES', 'LLM', 'ModelProxy', 'LLMPool', 'llm_pool']
\ No newline at end of file
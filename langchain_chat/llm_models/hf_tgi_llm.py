@@ -1,13 +1,14 @@
 import os
 from dataclasses import dataclass
 
-from transformers import AutoTokenizer
 from langchain_huggingface import HuggingFaceEndpoint
 from langchain_core.outputs import LLMResult
 from langchain_core.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
 
 from .llm import LLM
 from .my_chat_huggingface import MyChatHuggingFace
+from .llm_pool import pool_endpoint
+from ...langchain_chunkinator import tokenizer_registry
 
 _current_file_path = os.path.abspath(__file__)
 _current_directory = os.path.dirname(_current_file_path)
@@ -17,9 +18,12 @@ _summarizable_models = {'text-generation'}
 
 @dataclass(kw_only=True, slots=True)
 class HFTGI(LLM):
+    @staticmethod
+    def tokenizer_path(name: str) -> str:
+        return os.path.join(_new_folder_path, name.split(os.path.sep)[-1])
+
     def _load_tokenizer(self):
-        tokenizer = AutoTokenizer.from_pretrained(os.path.join(_new_folder_path, self.name.split(os.path.sep)[-1]))
-        return tokenizer
+        return tokenizer_registry.get(self.tokenizer_path(self.name))
 
     def load_summarizable_model(self):
         summary_llm = HuggingFaceEndpoint(
@@ -30,6 +34,7 @@ class HFTGI(LLM):
             task='summarization',
             server_kwargs=dict(self.server_kwargs)
         )
+        summary_llm = pool_endpoint(summary_llm)
         self.summary_object = MyChatHuggingFace(llm=summary_llm, tokenizer=self._load_tokenizer(), model_id=self.name)
 
     def __post_init__(self) -> None:
@@ -39,6 +44,7 @@ class HFTGI(LLM):
             streaming=self.stream,
             callbacks=callbacks, 
             **{'endpoint_url': self.endpoint['url'], **self.parameters, 'server_kwargs': dict(self.server_kwargs)})
+        llm = pool_endpoint(llm)
         chat = MyChatHuggingFace(llm=llm, tokenizer=self._load_tokenizer(), model_id=self.name)
         self.endpoint_object = chat
         if _summarizable_models:
@@ -0,0 +1,247 @@
+import os
+import json
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Any, AsyncIterable, List, Optional, Set, Tuple, Type
+
+from huggingface_hub import InferenceClient, AsyncInferenceClient
+from langchain_huggingface import HuggingFaceEndpoint
+
+from .llm import LLM
+from ..task_execution_context import authorization_var
+from ..logger import logger
+
+_POOL_SIZE = int(os.getenv('LLM_POOL_SIZE', 64))
+
+_CREDENTIAL_CLIENTS = int(os.getenv('LLM_POOL_CREDENTIAL_CLIENTS', 256))
+
+class PooledAsyncInferenceClient(AsyncInferenceClient):
+    """
+    AsyncInferenceClient that counts the calls in flight on it
+
+    Every call goes through the public `post`; a streamed call stays in flight until its
+    stream is read to the end or abandoned. A retired client closes once its last call
+    completes, so eviction never closes a client under a request still streaming from it.
+    """
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._in_flight = 0
+        self._retired = False
+
+    async def post(self, *, stream: bool = False, **kwargs: Any) -> bytes | AsyncIterable[bytes]:
+        self._in_flight += 1
+        try:
+            response = await super().post(stream=stream, **kwargs)
+        except BaseException:
+            await self._release()
+            raise
+        if not stream:
+            await self._release()
+            return response
+        return self._tracked(response)
+
+    async def _tracked(self, stream: AsyncIterable[bytes]) -> AsyncIterable[bytes]:
+        try:
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await self._release()
+
+    async def _release(self) -> None:
+        self._in_flight -= 1
+        if self._retired and not self._in_flight:
+            await RetiredClients.aclose_client(self)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def retire(self) -> None:
+        """Close this client once no call is in flight on it"""
+        self._retired = True
+        if not self._in_flight:
+            retired_clients.close(self)
+
+class RetiredClients:
+    """
+    Closes retired clients that have no call in flight
+
+    Eviction can happen in a synchronous call path, so a client is closed on the running
+    loop when there is one and otherwise kept until `aclose` at shutdown.
+    """
+    def __init__(self):
+        self._closing: Set[asyncio.Task] = set()
+        self._idle: List[AsyncInferenceClient] = []
+
+    def close(self, client: AsyncInferenceClient) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._idle.append(client)
+            return
+        task = loop.create_task(self.aclose_client(client))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def aclose_client(client: AsyncInferenceClient) -> None:
+        try:
+            await client.close()
+        except Exception as e:
+            logger.warning(f'Failed to close a retired inference client: {e}')
+
+    async def aclose(self) -> None:
+        """Close the retired clients still waiting on a loop and wait for those already closing"""
+        idle, self._idle = self._idle, []
+        for client in idle:
+            await self.aclose_client(client)
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+
+    def __len__(self) -> int:
+        return len(self._idle) + len(self._closing)
+
+retired_clients = RetiredClients()
+
+class CredentialClient:
+    """
+    Inference client of a pooled endpoint, resolving to one client per request credential
+
+    The pooled client is never mutated; each credential gets a client built once through the
+    public constructor with the pooled client's settings and that credential in its headers,
+    kept in a bounded LRU and retired once evicted.
+    """
+    def __init__(self, client: InferenceClient | AsyncInferenceClient, max_credentials: int = _CREDENTIAL_CLIENTS):
+        self.client = client
+        self.max_credentials = max_credentials
+        self._clients: OrderedDict[str, InferenceClient | AsyncInferenceClient] = OrderedDict()
+
+    @staticmethod
+    def settings(client: InferenceClient | AsyncInferenceClient) -> Dict[str, Any]:
+        settings = {
+            'model': client.model,
+            'timeout': client.timeout,
+            'cookies': client.cookies,
+            'proxies': client.proxies,
+        }
+        if isinstance(client, AsyncInferenceClient):
+            settings['trust_env'] = client.trust_env
+        return settings
+
+    def current(self) -> InferenceClient | AsyncInferenceClient:
+        if (authorization := authorization_var.get(None)) is None:
+            return self.client
+        if (client := self._clients.get(authorization)) is not None:
+            self._clients.move_to_end(authorization)
+            return client
+
+        headers = {**self.client.headers, 'Authorization': f'Bearer {authorization}'}
+        client = self._clients[authorization] = type(self.client)(headers=headers, **self.settings(self.client))
+        if len(self._clients) > self.max_credentials:
+            _, evicted = self._clients.popitem(last=False)
+            if isinstance(evicted, PooledAsyncInferenceClient):
+                evicted.retire()
+        return client
+
+    def retire(self) -> None:
+        """Close the pooled client and its per credential clients once their calls in flight complete"""
+        clients, self._clients = [self.client, *self._clients.values()], OrderedDict()
+        for client in clients:
+            if isinstance(client, PooledAsyncInferenceClient):
+                client.retire()
+
+    async def close(self) -> None:
+        """Close the sessions opened by the pooled client and its per credential clients"""
+        clients, self._clients = [self.client, *self._clients.values()], OrderedDict()
+        for client in clients:
+            if isinstance(client, AsyncInferenceClient):
+                await client.close()
+
+    def __getattr__(self, name: str) -> Any:
+        if name in ('client', '_clients'):
+            raise AttributeError(name)
+        return getattr(self.current(), name)
+
+def pool_endpoint(llm: HuggingFaceEndpoint) -> HuggingFaceEndpoint:
+    """Make a HuggingFaceEndpoint safe to share across requests"""
+    async_client = PooledAsyncInferenceClient(
+        headers=dict(llm.async_client.headers), 
+        **CredentialClient.settings(llm.async_client))
+    llm.client = CredentialClient(llm.client)
+    llm.async_client = CredentialClient(async_client)
+    return llm
+
+def credential_clients(model: LLM) -> List[CredentialClient]:
+    """Inference clients of a pooled model's endpoints"""
+    clients = []
+    for chat_model in (getattr(model, 'endpoint_object', None), getattr(model, 'summary_object', None)):
+        endpoint = getattr(chat_model, 'llm', None)
+        for client in (getattr(endpoint, 'client', None), getattr(endpoint, 'async_client', None)):
+            if isinstance(client, CredentialClient):
+                clients.append(client)
+    return clients
+
+def retire_model(model: LLM) -> None:
+    """Close the inference clients of an evicted model once their calls in flight complete"""
+    for client in credential_clients(model):
+        client.retire()
+
+async def aclose_model(model: LLM) -> None:
+    """Close the inference clients of a pooled model's endpoints"""
+    for client in credential_clients(model):
+        await client.close()
+
+def shared_server_kwargs(server_kwargs: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Server kwargs of a pooled model, request credentials travel through `authorization_var` instead"""
+    server_kwargs = dict(server_kwargs or {})
+    if 'headers' in server_kwargs:
+        server_kwargs['headers'] = {
+            name: value for name, value in server_kwargs['headers'].items() if name.lower() != 'authorization'
+        }
+    return server_kwargs
+
+class LLMPool:
+    """
+    Process-wide pool of LLM objects
+
+    Building an LLM creates HTTP clients and loads tokenizers, so objects are kept by
+    configuration and reused across requests. Request credentials are not part of the key;
+    they are overlaid per call through `authorization_var`. An evicted model may still be
+    streaming, so its clients close once their last call in flight completes.
+    """
+    def __init__(self, max_size: int = _POOL_SIZE):
+        self.max_size = max_size
+        self._models: OrderedDict[Tuple[str, str], LLM] = OrderedDict()
+
+    @staticmethod
+    def key(factory: Type[LLM], **kwargs: Any) -> Tuple[str, str]:
+        config = {**kwargs, 'server_kwargs': shared_server_kwargs(kwargs.get('server_kwargs'))}
+        return factory.__name__, json.dumps(config, sort_keys=True, default=str)
+
+    async def aget(self, factory: Type[LLM], **kwargs: Any) -> LLM:
+        """Return the pooled model for this configuration, building it on first use"""
+        key = self.key(factory, **kwargs)
+        if (model := self._models.get(key)) is not None:
+            self._models.move_to_end(key)
+            return model
+
+        logger.info(f'Building pooled model {kwargs.get('name')} for endpoint {kwargs.get('endpoint')}')
+        model = factory(**{**kwargs, 'server_kwargs': shared_server_kwargs(kwargs.get('server_kwargs'))})
+        self._models[key] = model
+        if len(self._models) > self.max_size:
+            _, evicted = self._models.popitem(last=False)
+            retire_model(evicted)
+        return model
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+    async def aclose(self) -> None:
+        """Release pooled models and close their inference clients and those already retired"""
+        models = list(self._models.values())
+        self._models.clear()
+        for model in models:
+            await aclose_model(model)
+        await retired_clients.aclose()
+
+llm_pool = LLMPool()
\ No newline at end of file
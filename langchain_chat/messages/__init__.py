@@ -1,19 +1,29 @@
 from .message_history import (
     MongoMessageHistorySchema,
     MongoMessageHistory,
+    GatedChatMessageHistory,
     SystemMessage,
     HumanMessage,
     AIMessage,
     BaseMessage,
     Sequence,
 )
+from .my_mongodb_chat_message_history import MyMongoDBChatMessageHistory
+from .summary_memory import SummaryMemory, summary_runner
+from .conversation_title import ConversationTitle, title_runner
 
 __all__ = [
     'MongoMessageHistorySchema',
     'MongoMessageHistory',
+    'GatedChatMessageHistory',
     'SystemMessage',
     'HumanMessage',
     'AIMessage',
     'BaseMessage',
     'Sequence',
+    'MyMongoDBChatMessageHistory',
+    'SummaryMemory',
+    'summary_runner',
+    'ConversationTitle',
+    'title_runner',
 ]
\ No newline at end of file
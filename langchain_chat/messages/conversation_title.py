@@ -0,0 +1,86 @@
+import os
+import re
+import math
+import asyncio
+from collections import Counter
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from langchain_core.runnables import Runnable
+from .my_mongodb_chat_message_history import MyMongoDBChatMessageHistory
+from ..background_tasks import BackgroundRunner
+from ..logger import logger
+
+_TITLE_CONCURRENCY = int(os.getenv('TITLE_CONCURRENCY', 1))
+
+# messages compared against the title's topic, and the similarity below which it is regenerated
+_TITLE_DRIFT_WINDOW = int(os.getenv('TITLE_DRIFT_WINDOW', 6))
+_TITLE_DRIFT_THRESHOLD = float(os.getenv('TITLE_DRIFT_THRESHOLD', 0.1))
+
+# extractive titles scoring lower fall back to the summary model
+_TITLE_CONFIDENCE = float(os.getenv('TITLE_CONFIDENCE', 0.5))
+
+_TITLE_TERMS = 50
+
+_MESSAGE_TYPES = ('human', 'ai', 'AIMessageChunk')
+
+_WORD_PATTERN = re.compile(r'[^\W\d_]{4,}')
+
+title_runner = BackgroundRunner('conversation_title', _TITLE_CONCURRENCY)
+
+def topic_terms(texts: Iterable[str]) -> Counter:
+    """Bag of longer words, a cheap proxy for what the conversation is about"""
+    return Counter(word for text in texts for word in _WORD_PATTERN.findall(str(text).lower()))
+
+def cosine_similarity(a: Dict[str, int], b: Dict[str, int]) -> float:
+    dot = sum(count * b.get(term, 0) for term, count in a.items())
+    norm = math.sqrt(sum(v * v for v in a.values())) * math.sqrt(sum(v * v for v in b.values()))
+    return dot / norm if norm else 0.0
+
+class ConversationTitle:
+    """
+    Generate a conversation's title once, and again only when the topic drifts
+
+    Titles set by the user are never overwritten. With an `extractor`, titles are taken from
+    the exchange's key phrases and the model is only called when the extractor is not confident.
+    """
+    def __init__(
+        self,
+        history: MyMongoDBChatMessageHistory,
+        chain: Runnable,
+        extractor: Optional[Callable[[str, str], Tuple[Optional[str], float]]] = None,
+    ):
+        self.history = history
+        self.chain = chain
+        self.extractor = extractor
+
+    async def agenerate(self, question: str, answer: str) -> str:
+        if self.extractor is not None:
+            title, confidence = await asyncio.to_thread(self.extractor, question, answer)
+            if title and confidence >= _TITLE_CONFIDENCE:
+                return title
+
+        response = await self.chain.ainvoke({'input': answer})
+        return response.content.strip()
+
+    async def arefresh(self) -> Optional[str]:
+        """Return the new title, or None when the current one still fits"""
+        state = await self.history.aget_title() or {}
+        title = state.get('title')
+        if title and title != state.get('generated_title'):
+            return None
+
+        documents = await self.history.arecent_documents(_TITLE_DRIFT_WINDOW, _MESSAGE_TYPES)
+        ai_messages = [document for document in documents if document['type'] != 'human']
+        if not ai_messages:
+            return None
+        human_messages = [document for document in documents if document['type'] == 'human']
+
+        terms = topic_terms(document['content'] for document in documents)
+        if title and cosine_similarity(terms, state.get('title_terms') or {}) >= _TITLE_DRIFT_THRESHOLD:
+            return None
+
+        question = str(human_messages[-1]['content']) if human_messages else ''
+        new_title = await self.agenerate(question, str(ai_messages[-1]['content']))
+        if await self.history.aset_generated_title(new_title, dict(terms.most_common(_TITLE_TERMS)), title):
+            logger.info(f'Conversation {self.history.session_id} titled {new_title!r}')
+            return new_title
+        return None
\ No newline at end of file
@@ -0,0 +1,50 @@
+"""
+Messages are stored as native BSON: `type` and `content` at the top level and the other
+message fields in a `message` subdocument. Legacy documents hold the whole message as a
+JSON string under `History` and stay readable until migrated.
+"""
+import json
+from typing import Any, Dict, List, Sequence
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+
+MESSAGE_KEY = 'message'
+
+LEGACY_HISTORY_KEY = 'History'
+
+_TOP_LEVEL_FIELDS = ('type', 'content')
+
+PROJECTION = {'type': 1, 'content': 1, MESSAGE_KEY: 1, LEGACY_HISTORY_KEY: 1, '_id': 0}
+
+def to_document(message: BaseMessage) -> Dict[str, Any]:
+    """Message fields to store, excluding session and timestamps"""
+    data = message_to_dict(message)['data']
+    return {
+        'type': message.type,
+        'content': message.content,
+        MESSAGE_KEY: {k: v for k, v in data.items() if k not in _TOP_LEVEL_FIELDS},
+    }
+
+def to_message_dict(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Stored document to the dict shape understood by `messages_from_dict`"""
+    if MESSAGE_KEY not in document:
+        return json.loads(document[LEGACY_HISTORY_KEY])
+
+    return {
+        'type': document['type'],
+        'data': {**document[MESSAGE_KEY], 'type': document['type'], 'content': document['content']},
+    }
+
+def from_documents(documents: Sequence[Dict[str, Any]]) -> List[BaseMessage]:
+    return messages_from_dict([to_message_dict(document) for document in documents])
+
+def additional_kwargs(document: Dict[str, Any]) -> Dict[str, Any]:
+    return to_message_dict(document).get('data', {}).get('additional_kwargs', {})
+
+def migration_update(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Update that rewrites a legacy document in the native format"""
+    message_dict = json.loads(document[LEGACY_HISTORY_KEY])
+    data = message_dict.get('data', {})
+    return {
+        '$set': {MESSAGE_KEY: {k: v for k, v in data.items() if k not in _TOP_LEVEL_FIELDS}},
+        '$unset': {LEGACY_HISTORY_KEY: ''},
+    }
\ No newline at end of file
@@ -1,8 +1,13 @@
-from typing import Sequence, Any
-from dataclasses import dataclass, field, asdict
+import asyncio
+from typing import Sequence, Any, Awaitable, Callable, List, Optional
+from dataclasses import dataclass, field
 from bson import ObjectId
+from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
 
 from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage, AIMessage
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.runnables import ConfigurableFieldSpec
 from langchain_core.runnables.history import (
     RunnableWithMessageHistory, 
     Runnable, 
@@ -14,7 +19,6 @@ from .my_mongodb_chat_message_history import MyMongoDBChatMessageHistory
 @dataclass(kw_only=True, slots=True)
 class BaseMessageHistorySchema:
     """Base Schema for a data store like Redis, MongoDB, PostgreSQL, ChromaDB, etc"""
-    connection_string: str
     database_name: str
     history_size: int = 1000
     session_id_key: str
@@ -23,31 +27,79 @@ class BaseMessageHistorySchema:
 class MongoMessageHistorySchema(BaseMessageHistorySchema):
     """Schema for MongoDB data store"""    
     collection_name: str
-    create_index: bool = True
     session_id: ObjectId
+    client: AsyncIOMotorClient = field(repr=False)
+    sync_client: Optional[Callable[[], MongoClient]] = field(default=None, repr=False)
+
+class GatedChatMessageHistory(BaseChatMessageHistory):
+    """Chat message history holding writes until `approved` resolves, and dropping them when it resolves False"""
+    def __init__(self, history: BaseChatMessageHistory, approved: Callable[[], Awaitable[bool]]):
+        self.history = history
+        self.approved = approved
+        self.deferred: List[BaseMessage] = []
+        try:
+            self.loop: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+        except RuntimeError:
+            self.loop = None
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        return self.history.messages
+
+    async def aget_messages(self) -> List[BaseMessage]:
+        return await self.history.aget_messages()
+
+    def defer(self, messages: Sequence[BaseMessage]) -> None:
+        """Hold messages to be written ahead of the next approved write"""
+        self.deferred.extend(messages)
+
+    def _release(self, messages: Sequence[BaseMessage]) -> List[BaseMessage]:
+        released, self.deferred = [*self.deferred, *messages], []
+        return released
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        """Blocks the calling thread on the verdict, which runs on the loop the history was created on"""
+        if self.loop is None:
+            approved = asyncio.run(self.approved())
+        else:
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is self.loop:
+                raise RuntimeError('A synchronous gated write would block the loop its verdict runs on, use `aadd_messages`')
+            approved = asyncio.run_coroutine_threadsafe(self.approved(), self.loop).result()
+        if approved:
+            self.history.add_messages(self._release(messages))
+
+    async def aadd_messages(self, messages: Sequence[BaseMessage]) -> None:
+        if await self.approved():
+            await self.history.aadd_messages(self._release(messages))
+
+    def clear(self) -> None:
+        self.history.clear()
+
+    async def aclear(self) -> None:
+        await self.history.aclear()
 
 class MongoMessageHistory:
     def __init__(self, schema: MongoMessageHistorySchema):
         self._schema = schema
-        self.chat_message_history = MyMongoDBChatMessageHistory(**asdict(self._schema))
+        self.chat_message_history = MyMongoDBChatMessageHistory(
+            self._schema.client,
+            self._schema.session_id,
+            self._schema.database_name,
+            self._schema.collection_name,
+            session_id_key=self._schema.session_id_key,
+            history_size=self._schema.history_size,
+            sync_client=self._schema.sync_client,
+        )
 
-    @property
-    def messages(self) -> list[BaseMessage]:
-        return self.chat_message_history.messages
-    
-    @property
-    def has_no_messages(self) -> bool:
-        return not self.messages
-
-    def add_messages(self, messages: Sequence[BaseMessage]):
-        """Add messages to store"""
-        self.chat_message_history.add_messages(messages)
+    async def aget_messages(self) -> list[BaseMessage]:
+        return await self.chat_message_history.aget_messages()
 
-    def system(self, prompt: str, **kwargs: Any) -> SystemMessage:
-        """Add system message to store"""
-        system_message = SystemMessage(prompt, **kwargs)
-        self.add_messages([system_message])
-        return system_message
+    async def ahas_no_messages(self) -> bool:
+        return not await self.aget_messages()
 
     async def aadd_messages(self, messages: Sequence[BaseMessage]):
         """Add messages to store"""
@@ -76,20 +128,34 @@ class MongoMessageHistory:
         await self.aadd_messages(messages)
         return True
 
-    def get_session_history(self):
-        return self.chat_message_history
-
-    def get(self, chain: Runnable[MessagesOrDictWithMessages, MessagesOrDictWithMessages | str | BaseMessage], rag_chain: bool) -> RunnableWithMessageHistory:
-        """Wraps a Runnable with a Chat History Runnable"""
+    @staticmethod
+    def keys(rag_chain: bool) -> dict:
         keys = {
             'input_messages_key': 'input',
             'history_messages_key': 'chat_history'
         }
         if rag_chain:
             keys['output_messages_key'] = 'answer'
+        return keys
+
+    @staticmethod
+    def configurable(chain: Runnable[MessagesOrDictWithMessages, MessagesOrDictWithMessages | str | BaseMessage], rag_chain: bool) -> RunnableWithMessageHistory:
+        """Wraps a Runnable with a Chat History Runnable taking the history from `configurable['message_history']`, shared by all sessions"""
+        def message_history(message_history: BaseChatMessageHistory) -> BaseChatMessageHistory:
+            return message_history
 
         return RunnableWithMessageHistory(
             chain,
-            self.get_session_history,
-            **keys
+            message_history,
+            history_factory_config=[
+                ConfigurableFieldSpec(
+                    id='message_history',
+                    annotation=BaseChatMessageHistory,
+                    name='Message History',
+                    description='Chat message history of the session',
+                    default=None,
+                    is_shared=True,
+                ),
+            ],
+            **MongoMessageHistory.keys(rag_chain)
         ).with_config(run_name='mongo_message_history')
\ No newline at end of file
@@ -1,59 +1,328 @@
-import json
 import datetime as dt
-from typing import List
-from pymongo import errors
-from langchain_mongodb import MongoDBChatMessageHistory
-from langchain_core.messages import BaseMessage, messages_from_dict, message_to_dict
+from typing import List, Optional, Sequence, Dict, Any, Tuple, Awaitable, Callable
+from pymongo import MongoClient, errors, ASCENDING, DESCENDING, UpdateOne
+from pymongo.collection import Collection
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import BaseMessage, SystemMessage
+from . import message_codec as codec
 from ..logger import logger
 
 _ROOT_COLLECTION='conversations'
 
-class MyMongoDBChatMessageHistory(MongoDBChatMessageHistory):
+_MIGRATION_BATCH_SIZE = 500
+
+_SUMMARY_PREFIX = 'Summary of the earlier conversation:\n'
+
+# messages inserted together share createdAt, so _id breaks ties in insertion order
+_ASCENDING_ORDER = [('createdAt', ASCENDING), ('_id', ASCENDING)]
+
+_DESCENDING_ORDER = [('createdAt', DESCENDING), ('_id', DESCENDING)]
+
+class MyMongoDBChatMessageHistory(BaseChatMessageHistory):
+    """
+    Chat message history on the application's shared Motor client
+
+    Connections come from the driver's pool, so building a history per request is free.
+    The sync interface runs on the pymongo client returned by `sync_client`, created by its
+    owner on first use, and blocks the calling thread, so it is meant for synchronous chain
+    runs off the event loop; without one it raises NotImplementedError.
+    """
+    def __init__(
+        self,
+        client: AsyncIOMotorClient,
+        session_id: str,
+        database_name: str,
+        collection_name: str,
+        *,
+        session_id_key: str,
+        history_size: Optional[int] = None,
+        sync_client: Optional[Callable[[], MongoClient]] = None,
+    ):
+        self.session_id = session_id
+        self.session_id_key = session_id_key
+        self.history_size = history_size
+        self.db = client[database_name]
+        self.collection = self.db[collection_name]
+        self.sync_client = sync_client
+
+    def _sync_collections(self) -> Tuple[Collection, Collection]:
+        """Root and message collections on the pymongo client serving the sync interface"""
+        if self.sync_client is None:
+            raise NotImplementedError('Synchronous history access needs a `sync_client`, use the async interface')
+        db = self.sync_client()[self.db.name]
+        return db[_ROOT_COLLECTION], db[self.collection.name]
+
     @property
     def messages(self) -> List[BaseMessage]:
-        """Retrieve the messages from MongoDB"""
+        """Sync counterpart of `aget_messages`"""
+        conversations, _ = self._sync_collections()
         try:
-            if self.history_size is None:
-                cursor = self.collection.find({self.session_id_key: self.session_id})
-            else:
-                total_docs_for_session = self.collection.count_documents({self.session_id_key: self.session_id})
-                skip_count = max(0, total_docs_for_session - self.history_size)
-                cursor = self.collection.find(
-                    {self.session_id_key: self.session_id}
-                ).skip(skip_count)
+            summary = conversations.find_one(
+                { '_id': self.session_id },
+                { 'summary': 1, 'summary_until': 1 })
+            documents = self._find(self._unsummarized_query(summary), codec.PROJECTION)
         except errors.OperationFailure as error:
             logger.error(error)
             return []
 
-        items = [json.loads(document[self.history_key]) for document in cursor] if cursor else []
-        messages = messages_from_dict(items)
-        return messages
+        return self._with_summary(summary, codec.from_documents(documents))
 
     def add_message(self, message: BaseMessage) -> None:
-        """Append the message to the record in MongoDB"""
+        self.add_messages([message])
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        """Sync counterpart of `aadd_messages`"""
+        if not messages:
+            return
+
+        conversations, collection = self._sync_collections()
+        try:
+            result = collection.insert_many(self._to_documents(messages))
+            conversations.update_one(
+                { '_id': self.session_id },
+                { '$push': { 'message_ids': { '$each': result.inserted_ids } } }
+            )
+        except errors.WriteError as err:
+            logger.error(err)
+
+    def clear(self) -> None:
+        _, collection = self._sync_collections()
+        try:
+            collection.delete_many({self.session_id_key: self.session_id})
+        except errors.WriteError as err:
+            logger.error(err)
+
+    def _find(
+        self,
+        query: Dict[str, Any],
+        projection: Dict[str, Any],
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Sync counterpart of `_afind`"""
+        _, collection = self._sync_collections()
+        limit = limit or self.history_size
+        if limit is None:
+            return list(collection.find(query, projection).sort(_ASCENDING_ORDER))
+
+        documents = list(collection.find(query, projection).sort(_DESCENDING_ORDER).limit(limit))
+        documents.reverse()
+        return documents
+
+    async def _afind(
+        self,
+        query: Dict[str, Any],
+        projection: Dict[str, Any],
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Up to `limit` (default `history_size`) most recent documents matching query, oldest first"""
+        limit = limit or self.history_size
+        if limit is None:
+            cursor = self.collection.find(query, projection).sort(_ASCENDING_ORDER)
+            return await cursor.to_list(length=None)
+
+        # tail read served by the (session id, createdAt, _id) index, reversed client side
+        cursor = self.collection.find(query, projection).sort(_DESCENDING_ORDER).limit(limit)
+        documents = await cursor.to_list(length=limit)
+        documents.reverse()
+        return documents
+
+    def _unsummarized_query(self, summary: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        query = {self.session_id_key: self.session_id}
+        if summary and (until := summary.get('summary_until')):
+            query['$or'] = [
+                {'createdAt': {'$gt': until['createdAt']}},
+                {'createdAt': until['createdAt'], '_id': {'$gt': until['_id']}},
+            ]
+        return query
+
+    async def aget_summary(self) -> Optional[Dict[str, Any]]:
+        """Running summary of the conversation and the last message folded into it"""
+        return await self.db[_ROOT_COLLECTION].find_one(
+            { '_id': self.session_id },
+            { 'summary': 1, 'summary_until': 1 })
+
+    async def aget_messages(self) -> List[BaseMessage]:
+        """Retrieve the running summary, if any, followed by the messages not yet folded into it"""
+        try:
+            summary = await self.aget_summary()
+            documents = await self._afind(self._unsummarized_query(summary), codec.PROJECTION)
+        except errors.OperationFailure as error:
+            logger.error(error)
+            return []
+
+        return self._with_summary(summary, codec.from_documents(documents))
+
+    @staticmethod
+    def _with_summary(summary: Optional[Dict[str, Any]], messages: List[BaseMessage]) -> List[BaseMessage]:
+        if summary and summary.get('summary'):
+            messages.insert(0, SystemMessage(
+                f'{_SUMMARY_PREFIX}{summary['summary']}', additional_kwargs={'summary': True}))
+        return messages
+
+    async def aget_unsummarized_documents(self) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Summary state and the raw documents not yet folded into it, oldest first"""
+        summary = await self.aget_summary()
+        documents = await self._afind(
+            self._unsummarized_query(summary),
+            {**codec.PROJECTION, '_id': 1, 'createdAt': 1})
+        return summary, documents
+
+    async def arecent_documents(self, n: int, types: Sequence[str]) -> List[Dict[str, Any]]:
+        """The `n` most recent documents of the given message types, oldest first"""
+        return await self._afind(
+            {self.session_id_key: self.session_id, 'type': {'$in': list(types)}},
+            codec.PROJECTION,
+            limit=n)
+
+    async def aupdate_summary(
+        self,
+        summary: str,
+        until: Dict[str, Any],
+        previous_until: Optional[Dict[str, Any]],
+    ) -> bool:
+        """Store a new running summary unless another worker moved it first"""
+        result = await self.db[_ROOT_COLLECTION].update_one(
+            { '_id': self.session_id, 'summary_until': previous_until },
+            { '$set': { 'summary': summary, 'summary_until': until } }
+        )
+        return result.modified_count > 0
+
+    async def aadd_messages(self, messages: Sequence[BaseMessage]) -> None:
+        """Append the messages to the record in MongoDB in one round trip"""
+        if not messages:
+            return
+
         try:
-            current_time = dt.datetime.now(dt.timezone.utc)
-            if( new_document := self.collection.insert_one(
-                {
-                    self.session_id_key: self.session_id,
-                    self.history_key: json.dumps(message_to_dict(message)),
-                    'createdAt': current_time,
-                    'updatedAt': current_time,
-                    'type': message.type,
-                    'content': message.content,
-                }
-            )) is not None:
-                logger.warning(f'session id type({type(self.session_id)})')
-                self.db[_ROOT_COLLECTION].update_one(
-                    { '_id': self.session_id },
-                    { '$push': { 'message_ids': new_document.inserted_id } }
-                )
-        
+            result = await self.collection.insert_many(self._to_documents(messages))
+            await self.db[_ROOT_COLLECTION].update_one(
+                { '_id': self.session_id },
+                { '$push': { 'message_ids': { '$each': result.inserted_ids } } }
+            )
         except errors.WriteError as err:
             logger.error(err)
 
-    def add_summary(self, summary: str) -> None:
-        self.db[_ROOT_COLLECTION].update_one(
+    def _to_documents(self, messages: Sequence[BaseMessage]) -> List[Dict[str, Any]]:
+        current_time = dt.datetime.now(dt.timezone.utc)
+        return [
+            {
+                self.session_id_key: self.session_id,
+                **codec.to_document(message),
+                'createdAt': current_time,
+                'updatedAt': current_time,
+            }
+            for message in messages
+        ]
+
+    async def aclear(self) -> None:
+        """Clear session memory from MongoDB"""
+        try:
+            await self.collection.delete_many({self.session_id_key: self.session_id})
+        except errors.WriteError as err:
+            logger.error(err)
+
+    async def aadd_summary(self, summary: str) -> None:
+        await self.db[_ROOT_COLLECTION].update_one(
             { '_id': self.session_id },
             { '$set': { 'title': summary } }
-        )
\ No newline at end of file
+        )
+
+    async def avector_sources(self) -> Optional[List[str]]:
+        """
+        Sources ingested into the conversation whose vectors have not expired
+
+        None for a conversation with uploads from before ingest was recorded, see `abackfill_vector_sources`
+        """
+        conversation = await self.db[_ROOT_COLLECTION].find_one(
+            {
+                '_id': self.session_id,
+                '$or': [
+                    { 'vectors_expire_at': { '$gt': dt.datetime.now(dt.timezone.utc) } },
+                    { 'vectors_expire_at': { '$exists': False } },
+                ],
+            },
+            { 'vector_sources': 1, 'vectors_expire_at': 1, 'filenames': 1 })
+        if conversation is None:
+            return []
+        if 'vectors_expire_at' in conversation:
+            return conversation.get('vector_sources', [])
+        return None if conversation.get('filenames') else []
+
+    async def abackfill_vector_sources(self, aprobe: Callable[[], Awaitable[bool]], ttl_seconds: int) -> List[str]:
+        """
+        Record the sources of a conversation ingested before they were recorded
+
+        The vector store is probed once; vectors found are given at most `ttl_seconds` to live,
+        and none found marks the conversation expired so it is never probed again
+        """
+        conversation = await self.db[_ROOT_COLLECTION].find_one(
+            { '_id': self.session_id },
+            { 'filenames': 1 })
+        sources = (conversation or {}).get('filenames', [])
+        if sources and not await aprobe():
+            sources = []
+
+        now = dt.datetime.now(dt.timezone.utc)
+        await self.db[_ROOT_COLLECTION].update_one(
+            { '_id': self.session_id, 'vectors_expire_at': { '$exists': False } },
+            { '$set': {
+                'vector_sources': sources,
+                'vectors_expire_at': now + dt.timedelta(seconds=ttl_seconds) if sources else now,
+            } })
+        logger.info(f'Backfilled vector sources {sources} of conversation {self.session_id}')
+        return sources
+
+    async def asource_digests(self) -> List[str]:
+        """Content digests of the documents ingested into the conversation"""
+        conversation = await self.db[_ROOT_COLLECTION].find_one(
+            { '_id': self.session_id },
+            { 'source_digests': 1 })
+        return (conversation or {}).get('source_digests', [])
+
+    async def aget_title(self) -> Optional[Dict[str, Any]]:
+        """Current title, the last generated one and the topic terms it was generated from"""
+        return await self.db[_ROOT_COLLECTION].find_one(
+            { '_id': self.session_id },
+            { 'title': 1, 'generated_title': 1, 'title_terms': 1 })
+
+    async def aset_generated_title(
+        self,
+        title: str,
+        terms: Dict[str, int],
+        previous_title: Optional[str],
+    ) -> bool:
+        """Store a generated title unless the title changed meanwhile, e.g. renamed by the user"""
+        result = await self.db[_ROOT_COLLECTION].update_one(
+            { '_id': self.session_id, 'title': previous_title },
+            { '$set': { 'title': title, 'generated_title': title, 'title_terms': terms } }
+        )
+        return result.modified_count > 0
+
+    @staticmethod
+    async def amigrate(
+        collection: AsyncIOMotorCollection,
+        batch_size: int = _MIGRATION_BATCH_SIZE,
+    ) -> int:
+        """
+        Online migration of legacy JSON-string documents to the native format
+
+        Works in small unordered batches so it can run alongside live traffic;
+        readers understand both formats while it is in progress
+        """
+        migrated = 0
+        query = {codec.LEGACY_HISTORY_KEY: {'$type': 'string'}}
+        while True:
+            documents = await collection.find(
+                query, {codec.LEGACY_HISTORY_KEY: 1}).limit(batch_size).to_list(length=batch_size)
+            if not documents:
+                break
+
+            operations = [
+                UpdateOne({'_id': document['_id']}, codec.migration_update(document))
+                for document in documents
+            ]
+            result = await collection.bulk_write(operations, ordered=False)
+            migrated += result.modified_count
+            logger.info(f'Migrated {migrated} message history documents')
+
+        return migrated
\ No newline at end of file
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from typing import Optional
 from langchain_core.prompts import (
     ChatPromptTemplate, 
@@ -14,6 +15,11 @@ def register(name):
         return func
     return decorator
 
+@lru_cache(maxsize=256)
+def template(name: str, *args: Optional[str]):
+    """Registered template built once per distinct arguments, such as each preprompt"""
+    return registry[name](*args)
+
 BASE_TEMPLATE="""
     Given the conversation history below, generate a search query that is more explicit and detailed.
 
@@ -90,6 +96,21 @@ def summarization_template():
      """Returns runnable"""
      return ChatPromptTemplate.from_template(SUMMARIZATION_TEMPLATE)
 
+CONVERSATION_SUMMARY_TEMPLATE = """Progressively summarize the lines of conversation provided, adding onto the previous summary and returning a new summary.
+Keep names, numbers, identifiers and decisions that later questions may refer to.
+
+Current summary:
+{summary}
+
+New lines of conversation:
+{input}
+
+New summary:"""
+@register('conversation_summary_template')
+def conversation_summary_template():
+     """Returns runnable"""
+     return ChatPromptTemplate.from_template(CONVERSATION_SUMMARY_TEMPLATE)
+
 """
 Note the actual "context" of this ChatPromptTemplate are dynamically generated
 based on the number of documents to compare
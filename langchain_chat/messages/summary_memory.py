@@ -0,0 +1,80 @@
+import os
+import asyncio
+from typing import Callable, Dict, Any, List
+from langchain_core.language_models import LanguageModelLike
+from langchain_core.prompts import BasePromptTemplate
+from .my_mongodb_chat_message_history import MyMongoDBChatMessageHistory
+from ..background_tasks import BackgroundRunner
+from ..logger import logger
+
+_SUMMARY_CONCURRENCY = int(os.getenv('SUMMARY_CONCURRENCY', 2))
+
+_ROLES = {
+    'human': 'User',
+    'ai': 'Assistant',
+    'AIMessageChunk': 'Assistant',
+}
+
+summary_runner = BackgroundRunner('summary_memory', _SUMMARY_CONCURRENCY)
+
+class SummaryMemory:
+    """
+    Rolling summary memory for long conversations
+
+    Once the unsummarized part of a conversation exceeds `trigger_tokens`, everything but
+    the most recent `keep_tokens` is folded into a running summary on the conversation
+    document. History then loads as the summary followed by the recent tail.
+    """
+    def __init__(
+        self,
+        history: MyMongoDBChatMessageHistory,
+        llm: LanguageModelLike,
+        prompt: BasePromptTemplate,
+        count_tokens: Callable[[str], int],
+        trigger_tokens: int,
+        keep_tokens: int,
+    ):
+        self.history = history
+        self.chain = prompt | llm
+        self.count_tokens = count_tokens
+        self.trigger_tokens = trigger_tokens
+        self.keep_tokens = keep_tokens
+
+    def _split(self, documents: List[Dict[str, Any]]) -> int:
+        """Index of the first document of the tail to keep, which opens on a human turn"""
+        counts = [self.count_tokens(str(document['content'])) for document in documents]
+        if sum(counts) <= self.trigger_tokens:
+            return 0
+
+        split, kept = len(documents), 0
+        for i in range(len(documents) - 1, -1, -1):
+            if kept + counts[i] > self.keep_tokens:
+                break
+            kept += counts[i]
+            split = i
+
+        while split < len(documents) and documents[split]['type'] != 'human':
+            split += 1
+        return split
+
+    async def acompact(self) -> bool:
+        """Fold older turns into the running summary, returning True if it moved"""
+        summary, documents = await self.history.aget_unsummarized_documents()
+        if not (split := await asyncio.to_thread(self._split, documents)):
+            return False
+
+        lines = '\n'.join(
+            f'{_ROLES[document['type']]}: {document['content']}'
+            for document in documents[:split]
+            if document['type'] in _ROLES
+        )
+        previous = (summary or {}).get('summary') or 'None'
+        response = await self.chain.ainvoke({'summary': previous, 'input': lines})
+
+        last = documents[split - 1]
+        moved = await self.history.aupdate_summary(
+            response.content.strip(),
+            {'createdAt': last['createdAt'], '_id': last['_id']},
+            (summary or {}).get('summary_until'))
+        logger.info(f'Folded {split} messages into conversation summary (stored: {moved})')
+        return moved
\ No newline at end of file
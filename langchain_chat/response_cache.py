@@ -0,0 +1,139 @@
+import os
+import re
+import json
+import hashlib
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from langchain_core.language_models import LanguageModelInput
+from langchain_core.messages import AIMessageChunk, BaseMessage, BaseMessageChunk
+from langchain_core.prompt_values import PromptValue
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+from .logger import logger
+
+_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 3600 * 24))
+
+_KEY_PREFIX = 'response_cache'
+
+_STREAM_PATTERN = re.compile(r'\S+\s*|\s+')
+
+def canonical_prompt(input: LanguageModelInput) -> str:
+    """Rendered prompt as JSON with sorted keys, equal for equal message sequences"""
+    if isinstance(input, PromptValue):
+        messages = input.to_messages()
+    elif isinstance(input, str):
+        return json.dumps([['human', input]])
+    else:
+        messages = input
+    return json.dumps(
+        [[message.type, message.content] for message in messages],
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str)
+
+class ResponseCache:
+    """
+    Answers of deterministic generations, keyed by the scope and a sha256 of the model,
+    its parameters and the fully rendered prompt, held in Redis strings with a TTL
+
+    The scope, the user, keeps one user's answers from being replayed to another.
+    """
+    def __init__(
+        self,
+        redis_client: Callable[[], Awaitable[Redis]],
+        ttl_seconds: int = _CACHE_TTL,
+    ):
+        self.redis_client = redis_client
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def redis_key(scope: str, model: str, input: LanguageModelInput) -> str:
+        digest = hashlib.sha256(f'{model}\0{canonical_prompt(input)}'.encode('utf-8')).hexdigest()
+        return f'{_KEY_PREFIX}:{scope}:{digest}'
+
+    async def aget(self, key: str) -> Optional[str]:
+        try:
+            value = await (await self.redis_client()).get(key)
+        except RedisError as e:
+            logger.warning(f'Response cache read failed: {e}')
+            value = None
+
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value.decode('utf-8') if isinstance(value, bytes) else value
+
+    async def aput(self, key: str, content: str) -> None:
+        try:
+            await (await self.redis_client()).set(key, content, ex=self.ttl_seconds)
+        except RedisError as e:
+            logger.warning(f'Response cache write failed: {e}')
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit and miss counters since the process started"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'lookups': lookups,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def wrap(
+        self,
+        llm: Runnable,
+        model: str,
+        scope: str,
+        approved: Optional[Callable[[], Awaitable[bool]]] = None,
+    ) -> Runnable:
+        return CachedChatModel(llm, self, model, scope, approved).runnable
+
+class CachedChatModel:
+    """
+    Chat model replaying cached answers as a token stream, and caching the answers it streams
+
+    `runnable` stands in for the chat model in a chain. When given, `approved` is awaited
+    before an answer is stored and a False keeps it out of the cache.
+    """
+    def __init__(
+        self,
+        llm: Runnable,
+        cache: ResponseCache,
+        model: str,
+        scope: str,
+        approved: Optional[Callable[[], Awaitable[bool]]] = None,
+    ):
+        self.llm = llm
+        self.cache = cache
+        self.model = model
+        self.scope = scope
+        self.approved = approved
+        self.runnable = RunnableLambda(self._invoke, afunc=self._astream, name='cached_chat_model')
+
+    async def _aput(self, key: str, content: str) -> None:
+        if self.approved is None or await self.approved():
+            await self.cache.aput(key, content)
+
+    @staticmethod
+    def replay(content: str) -> Iterator[str]:
+        yield from _STREAM_PATTERN.findall(content)
+
+    def _invoke(self, input: LanguageModelInput, config: RunnableConfig) -> BaseMessage:
+        return self.llm.invoke(input, config)
+
+    async def _astream(self, input: LanguageModelInput, config: RunnableConfig) -> AsyncIterator[BaseMessageChunk]:
+        key = self.cache.redis_key(self.scope, self.model, input)
+        if (content := await self.cache.aget(key)) is not None:
+            for token in self.replay(content):
+                yield AIMessageChunk(content=token)
+            return
+
+        parts: List[str] = []
+        async for chunk in self.llm.astream(input, config):
+            parts.append(chunk.content)
+            yield chunk
+        # only complete answers are stored, a stream abandoned midway never reaches here
+        await self._aput(key, ''.join(parts))
\ No newline at end of file
@@ -1,3 +1,5 @@
 from contextvars import ContextVar
 
-session_id_var = ContextVar('session_id')
\ No newline at end of file
+session_id_var = ContextVar('session_id')
+
+authorization_var = ContextVar('authorization')
\ No newline at end of file
@@ -0,0 +1,42 @@
+import pytest
+from orchestrators.chat.langchain_harmony import extract_title
+
+@pytest.fixture
+def question() -> str:
+    return 'What is the difference between Continuous Bag of Words and Binary Bag of Words?'
+
+@pytest.fixture
+def answer() -> str:
+    return (
+        'Continuous Bag of Words predicts a word from its context, while Binary Bag of Words '
+        'records only whether each word occurs in a document. Continuous Bag of Words learns dense embeddings.'
+    )
+
+def test_titles_with_shared_key_phrases(question: str, answer: str):
+    title, confidence = extract_title(question, answer)
+    assert set(title.split()) == {'Bag', 'Words', 'Continuous', 'Binary'}
+    assert confidence == 1.0
+
+def test_frequent_bigrams_stay_together():
+    title, _ = extract_title(
+        'How does Redis vector search work?',
+        'Redis vector search indexes embeddings with FLAT or HNSW and answers KNN queries over them.')
+    assert 'Vector Search' in title
+
+@pytest.mark.parametrize('max_words', [1, 2, 3])
+def test_max_words(question: str, answer: str, max_words: int):
+    title, _ = extract_title(question, answer, max_words=max_words)
+    assert 0 < len(title.split()) <= max_words
+
+def test_short_exchanges_are_not_trusted():
+    title, confidence = extract_title('What is Kubernetes?', 'Kubernetes orchestrates containers.')
+    assert title.startswith('Kubernetes')
+    assert confidence < 0.5
+
+def test_keeps_the_original_spelling():
+    title, _ = extract_title('Explain photosynthesis in plants', 'Photosynthesis converts light energy in plants.')
+    assert 'Photosynthesis' in title.split()
+
+@pytest.mark.parametrize('question, answer', [('', ''), ('Is it?', 'It is.')])
+def test_no_content_words(question: str, answer: str):
+    assert extract_title(question, answer) == (None, 0.0)
\ No newline at end of file
@@ -0,0 +1,64 @@
+import pytest
+from typing import Callable
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+from orchestrators.chat.langchain_chat.chat_bot import (
+    ChatBot, _TEMPLATE_TOKEN_RESERVE, _MESSAGE_TOKEN_OVERHEAD)
+from orchestrators.chat.langchain_chat.task_execution_context import session_id_var
+
+@pytest.fixture(autouse=True)
+def session_id():
+    # the chat logger tags every record with the session
+    session_id_var.set('test-session')
+
+@pytest.fixture
+def history() -> list:
+    return [
+        SystemMessage('be brief', additional_kwargs={'preprompt': True}),
+        HumanMessage('one two'),
+        AIMessage('three four'),
+        HumanMessage('five six'),
+        AIMessage('seven eight'),
+    ]
+
+def fixed_tokens(preprompt: str = 'be brief', question: str = 'question') -> int:
+    """Tokens spent before any unpinned message: reserve, preprompt, input and the pinned preprompt message"""
+    return _TEMPLATE_TOKEN_RESERVE + 2 * len(preprompt.split()) + len(question.split()) + _MESSAGE_TOKEN_OVERHEAD
+
+@pytest.fixture
+def trim(whitespace_tokenizer) -> Callable[[list, int], list]:
+    def trim(history: list, budget: int) -> list:
+        config = {
+            'configurable': {
+                'tokenizer': whitespace_tokenizer,
+                'preprompt': 'be brief',
+                'input_token_budget': budget,
+            }
+        }
+        result = ChatBot.history_trimmer().invoke({'input': 'question', 'chat_history': history}, config=config)
+        return [message.content for message in result['chat_history']]
+    return trim
+
+def test_keeps_everything_within_budget(history: list, trim: Callable):
+    assert trim(history, 10_000) == [message.content for message in history]
+
+def test_keeps_latest_turns_that_fit(history: list, trim: Callable):
+    # room for the last two messages of two words each
+    budget = fixed_tokens() + 2 * (2 + _MESSAGE_TOKEN_OVERHEAD)
+    assert trim(history, budget) == ['be brief', 'five six', 'seven eight']
+
+def test_never_opens_on_an_ai_reply(history: list, trim: Callable):
+    # room for the last message only, an ai reply without its question
+    budget = fixed_tokens() + 2 + _MESSAGE_TOKEN_OVERHEAD
+    assert trim(history, budget) == ['be brief']
+
+def test_pins_preprompt_and_summary_without_budget(history: list, trim: Callable):
+    summary = SystemMessage('earlier turns', additional_kwargs={'summary': True})
+    assert trim([summary, *history], 0) == ['earlier turns', 'be brief']
+
+def test_plain_system_messages_are_not_pinned(history: list, trim: Callable):
+    history.insert(1, SystemMessage('not pinned'))
+    budget = fixed_tokens() + 2 * (2 + _MESSAGE_TOKEN_OVERHEAD)
+    assert 'not pinned' not in trim(history, budget)
+
+def test_empty_history_is_unchanged(trim: Callable):
+    assert trim([], 0) == []
\ No newline at end of file
@@ -0,0 +1,47 @@
+import json
+import pytest
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, message_to_dict
+from orchestrators.chat.langchain_chat.messages import message_codec as codec
+
+@pytest.fixture
+def messages() -> list:
+    return [
+        SystemMessage('You are helpful', additional_kwargs={'preprompt': True}),
+        HumanMessage('What is BM25?', additional_kwargs={'files': ['notes.pdf']}),
+        AIMessage('A ranking function.', response_metadata={'model': 'llama'}),
+    ]
+
+def stored(document: dict) -> dict:
+    """Document as read back with the history projection"""
+    return {key: value for key, value in document.items() if key in codec.PROJECTION}
+
+def test_round_trip(messages: list):
+    documents = [stored(codec.to_document(message)) for message in messages]
+    assert codec.from_documents(documents) == messages
+
+def test_type_and_content_at_top_level(messages: list):
+    document = codec.to_document(messages[1])
+    assert document['type'] == 'human'
+    assert document['content'] == 'What is BM25?'
+    assert 'type' not in document[codec.MESSAGE_KEY]
+    assert 'content' not in document[codec.MESSAGE_KEY]
+
+def test_legacy_documents_are_readable(messages: list):
+    documents = [{codec.LEGACY_HISTORY_KEY: json.dumps(message_to_dict(message))} for message in messages]
+    assert codec.from_documents(documents) == messages
+
+def test_additional_kwargs(messages: list):
+    native = codec.to_document(messages[0])
+    legacy = {codec.LEGACY_HISTORY_KEY: json.dumps(message_to_dict(messages[0]))}
+    assert codec.additional_kwargs(native) == {'preprompt': True}
+    assert codec.additional_kwargs(legacy) == {'preprompt': True}
+
+def test_migration_matches_native_format(messages: list):
+    for message in messages:
+        legacy = {'type': message.type, 'content': message.content,
+                  codec.LEGACY_HISTORY_KEY: json.dumps(message_to_dict(message))}
+        update = codec.migration_update(legacy)
+        migrated = {**{k: v for k, v in legacy.items() if k != codec.LEGACY_HISTORY_KEY}, **update['$set']}
+        assert update['$unset'] == {codec.LEGACY_HISTORY_KEY: ''}
+        assert migrated == codec.to_document(message)
+        assert codec.from_documents([migrated]) == [message]
\ No newline at end of file
@@ -0,0 +1,59 @@
+import asyncio
+import pytest
+from orchestrators.chat.langchain_chat.verdict_cache import VerdictCache, normalize
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock() -> Clock:
+    return Clock()
+
+@pytest.mark.parametrize('text, expected', [
+    ('How do I  bake\tbread?', 'how do i bake bread?'),
+    ('  Trailing and leading  ', 'trailing and leading'),
+    ('STRASSE', 'strasse'),
+    ('Straße', 'strasse'),
+    ('ｆｕｌｌ ｗｉｄｔｈ', 'full width'),
+])
+def test_normalize(text: str, expected: str):
+    assert normalize(text) == expected
+
+def test_rephrased_prompt_shares_the_digest():
+    assert VerdictCache.digest('Is this SAFE?', 'prompt') == VerdictCache.digest('is   this safe?', 'prompt')
+
+def test_prompt_is_part_of_the_digest():
+    assert VerdictCache.digest('text', 'prompt v1') != VerdictCache.digest('text', 'prompt v2')
+
+def test_hit_after_put(clock: Clock):
+    cache = VerdictCache(maxsize=10, ttl_seconds=60, clock=clock)
+    asyncio.run(cache.aput('guard', 'Hello there', False))
+    assert asyncio.run(cache.aget('guard', 'hello   THERE')) is False
+    assert asyncio.run(cache.aget('other-guard', 'hello there')) is None
+    assert cache.stats()['local_hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+def test_entries_expire_after_ttl(clock: Clock):
+    cache = VerdictCache(maxsize=10, ttl_seconds=60, clock=clock)
+    asyncio.run(cache.aput('guard', 'hello', True))
+    clock.now += 59
+    assert asyncio.run(cache.aget('guard', 'hello')) is True
+    clock.now += 1
+    assert asyncio.run(cache.aget('guard', 'hello')) is None
+    assert cache.stats()['size'] == 0
+
+def test_least_recently_used_is_evicted(clock: Clock):
+    cache = VerdictCache(maxsize=2, ttl_seconds=60, clock=clock)
+    asyncio.run(cache.aput('guard', 'first', True))
+    asyncio.run(cache.aput('guard', 'second', True))
+    # reading `first` makes `second` the least recently used
+    assert asyncio.run(cache.aget('guard', 'first')) is True
+    asyncio.run(cache.aput('guard', 'third', True))
+    assert asyncio.run(cache.aget('guard', 'second')) is None
+    assert asyncio.run(cache.aget('guard', 'first')) is True
+    assert asyncio.run(cache.aget('guard', 'third')) is True
+    assert cache.stats()['size'] == 2
\ No newline at end of file
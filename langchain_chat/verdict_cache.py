@@ -0,0 +1,127 @@
+import os
+import re
+import time
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple, Any
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from .logger import logger
+
+_CACHE_SIZE = int(os.getenv('GUARDRAILS_CACHE_SIZE', 10000))
+
+_CACHE_TTL = int(os.getenv('GUARDRAILS_CACHE_TTL', 3600 * 24))
+
+_KEY_PREFIX = 'guardrail_verdict'
+
+_WHITESPACE = re.compile(r'\s+')
+
+def normalize(text: str) -> str:
+    """Fold case, unicode forms and whitespace, so a resent prompt hashes the same"""
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFKC', text).casefold()).strip()
+
+class VerdictCache:
+    """
+    Two-tier cache of guardrail verdicts keyed by (guardrail model name, sha256(normalized text))
+
+    The guardrail prompt is part of the digest, so changing its categories starts a new cache.
+    An in-process LRU with TTL sits in front of Redis strings expiring after the same TTL,
+    so workers share the verdicts any of them obtained.
+    """
+    def __init__(
+        self,
+        redis_client: Optional[Callable[[], Awaitable[Redis]]] = None,
+        maxsize: int = _CACHE_SIZE,
+        ttl_seconds: int = _CACHE_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.redis_client = redis_client
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._local: OrderedDict[Tuple[str, str], Tuple[bool, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def digest(text: str, prompt: str = '') -> str:
+        return hashlib.sha256(f'{prompt}\0{normalize(text)}'.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def redis_key(model_name: str, digest: str) -> str:
+        return f'{_KEY_PREFIX}:{model_name}:{digest}'
+
+    def _get_local(self, key: Tuple[str, str]) -> Optional[bool]:
+        with self._lock:
+            if (entry := self._local.get(key)) is None:
+                return None
+            verdict, expires_at = entry
+            if expires_at <= self.clock():
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            return verdict
+
+    def _put_local(self, key: Tuple[str, str], verdict: bool) -> None:
+        with self._lock:
+            self._local[key] = (verdict, self.clock() + self.ttl_seconds)
+            self._local.move_to_end(key)
+            while len(self._local) > self.maxsize:
+                self._local.popitem(last=False)
+
+    def _count(self, local_hits: int, redis_hits: int, misses: int) -> None:
+        with self._lock:
+            self.local_hits += local_hits
+            self.redis_hits += redis_hits
+            self.misses += misses
+
+    async def aget(self, model_name: str, text: str, prompt: str = '') -> Optional[bool]:
+        """Cached verdict, True when safe, or None when neither tier has one"""
+        digest = self.digest(text, prompt)
+        if (verdict := self._get_local((model_name, digest))) is not None:
+            self._count(1, 0, 0)
+            return verdict
+
+        if self.redis_client is not None:
+            try:
+                value = await (await self.redis_client()).get(self.redis_key(model_name, digest))
+            except RedisError as e:
+                logger.warning(f'Guardrail verdict cache read failed: {e}')
+                value = None
+
+            if value is not None:
+                verdict = value in (b'1', '1')
+                self._put_local((model_name, digest), verdict)
+                self._count(0, 1, 0)
+                return verdict
+
+        self._count(0, 0, 1)
+        return None
+
+    async def aput(self, model_name: str, text: str, verdict: bool, prompt: str = '') -> None:
+        digest = self.digest(text, prompt)
+        self._put_local((model_name, digest), verdict)
+        if self.redis_client is None:
+            return
+
+        try:
+            await (await self.redis_client()).set(
+                self.redis_key(model_name, digest), '1' if verdict else '0', ex=self.ttl_seconds)
+        except RedisError as e:
+            logger.warning(f'Guardrail verdict cache write failed: {e}')
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit and miss counters since the process started"""
+        with self._lock:
+            lookups = self.local_hits + self.redis_hits + self.misses
+            return {
+                'local_hits': self.local_hits,
+                'redis_hits': self.redis_hits,
+                'misses': self.misses,
+                'hit_rate': (self.local_hits + self.redis_hits) / lookups if lookups else 0.0,
+                'size': len(self._local),
+            }
\ No newline at end of file
@@ -1,3 +1,4 @@
-from .chunkinator import Chunkinator
+from .chunkinator import Chunkinator, tokenizer_path
+from .tokenizer_registry import TokenizerRegistry, tokenizer_registry
 
-__all__ = ['Chunkinator']
\ No newline at end of file
+__all__ = ['Chunkinator', 'tokenizer_path', 'TokenizerRegistry', 'tokenizer_registry']
\ No newline at end of file
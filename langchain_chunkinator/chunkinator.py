@@ -1,75 +1,55 @@
 from __future__ import annotations
 
 import os
-import json
-import importlib
 from typing import List
 from collections import namedtuple
 import itertools as it
-from functools import lru_cache
-from transformers import PreTrainedTokenizerBase
 from langchain.text_splitter import RecursiveCharacterTextSplitter as Splitter
 from langchain_core.documents import Document
 from .embedding_like import EmbeddingLike
+from .tokenizer_registry import tokenizer_registry
 
 _tokenizer_dir = 'local_tokenizer'
 
-@lru_cache(maxsize=1)
+def tokenizer_path(embedding_name: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), _tokenizer_dir, embedding_name)
+
 def _tokenizer(embedding_name: str):
-    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)),_tokenizer_dir, embedding_name, 'tokenizer_config.json'), 'r') as f:
-        tokenizer_config = json.load(f)
-        tokenizer_class_name: PreTrainedTokenizerBase = tokenizer_config['tokenizer_class']
-        transformers_module = importlib.import_module('transformers')
-        cls = getattr(transformers_module, tokenizer_class_name)
-        tokenizer = cls.from_pretrained(os.path.join(os.path.dirname(os.path.abspath(__file__)),_tokenizer_dir, embedding_name))
-        return tokenizer
+    return tokenizer_registry.get(tokenizer_path(embedding_name))
 
 class Chunkinator:
     Expo = namedtuple('Expo', ['x0', 'x1', 'x2', 'x3'])
 
     class BinPack:
+        """Pack documents into embedding requests within the server's token and batch size limits"""
         def __init__(self, documents: List[Document], embedding: EmbeddingLike):
             self.documents = documents
             self.embedding = embedding
             self.embedding_name = self.embedding.name.split('/')[1]
             self.tokenizer = _tokenizer(self.embedding_name)            
 
-        def chunk(self, documents: List[Document], max_tokens: int) -> List[List[List[str]]]:
-            sorted_documents = sorted(documents, 
-                key=lambda doc: len(doc.page_content), reverse=True)
-            batches = []
-            current_batch = []
-            current_batch_tokens = 0
-
-            for document in sorted_documents:
-                token_content = self.tokenizer.encode(document.page_content)
-                token_len = len(document.page_content)
-
-                if current_batch_tokens + token_len <= max_tokens:
-                    current_batch.append(token_content)
-                    current_batch_tokens += token_len
-                
-                elif token_len > max_tokens:
-                    start = 0
-                    while start < token_len:
-                        remaining_space = max_tokens - current_batch_tokens
-
-                        if remaining_space > 0:
-                            token_slice = token_content[start:start+remaining_space]
-                            current_batch.append(token_slice)
-                            current_batch_tokens += len(token_slice)
-                            start += len(token_slice)
-                        else:
-                            batches.append(current_batch)
-                            current_batch = []
-                            current_batch_tokens = 0
+        def chunk(self) -> List[List[Document]]:
+            """
+            First fit decreasing on token counts, so each batch holds at most `max_batch_tokens`
+            tokens and `max_client_batch_size` documents. A document longer than `max_batch_tokens`
+            gets a batch of its own and is left to the server's truncation
+            """
+            max_tokens = self.embedding.max_batch_tokens
+            max_size = self.embedding.max_client_batch_size
+            token_lens = [len(self.tokenizer.encode(document.page_content)) for document in self.documents]
+            order = sorted(range(len(self.documents)), key=lambda i: token_lens[i], reverse=True)
+
+            batches: List[List[Document]] = []
+            batch_tokens: List[int] = []
+            for i in order:
+                for b, batch in enumerate(batches):
+                    if len(batch) < max_size and batch_tokens[b] + token_lens[i] <= max_tokens:
+                        batch.append(self.documents[i])
+                        batch_tokens[b] += token_lens[i]
+                        break
                 else:
-                    batches.append(current_batch)
-                    current_batch = [token_content]
-                    current_batch_tokens = token_len
-
-            if current_batch:
-                batches.append(current_batch)
+                    batches.append([self.documents[i]])
+                    batch_tokens.append(token_lens[i])
 
             return batches
 
@@ -10,6 +10,10 @@ class EmbeddingLike(Protocol):
     def max_batch_tokens(self) -> Annotated[int, Doc('Max tokens per batch')]:
         ...
 
+    @property
+    def max_client_batch_size(self) -> Annotated[int, Doc('Max inputs per request')]:
+        ...
+
     @property
     def max_batch_requests(self) -> Annotated[int, Doc('Max requests per batch')]:
         ...
\ No newline at end of file
@@ -0,0 +1,47 @@
+import pytest
+from types import SimpleNamespace
+from typing import Callable
+from orchestrators.chat.langchain_chunkinator import chunkinator
+from orchestrators.chat.langchain_chunkinator.chunkinator import Chunkinator
+
+@pytest.fixture(autouse=True)
+def tokenizer(monkeypatch: pytest.MonkeyPatch, whitespace_tokenizer):
+    monkeypatch.setattr(chunkinator, '_tokenizer', lambda embedding_name: whitespace_tokenizer)
+
+def embedding(max_batch_tokens: int, max_client_batch_size: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        name='org/embedding-model',
+        max_batch_tokens=max_batch_tokens,
+        max_client_batch_size=max_client_batch_size,
+        max_batch_requests=1)
+
+@pytest.fixture
+def sized(documents: Callable) -> Callable[..., list]:
+    """Documents of `n` one-word tokens each, recording `n` as their metadata"""
+    return lambda *token_counts: documents('tokens', *token_counts, content=lambda n: ' '.join(['word'] * n))
+
+def token_counts(batches: list) -> list:
+    return [[document.metadata['tokens'] for document in batch] for batch in batches]
+
+def test_first_fit_decreasing(sized: Callable):
+    batches = Chunkinator.BinPack(sized(3, 1, 5, 2, 4), embedding(6, 10)).chunk()
+    assert token_counts(batches) == [[5, 1], [4, 2], [3]]
+
+@pytest.mark.parametrize('max_tokens, max_size', [(10, 3), (7, 10), (100, 2)])
+def test_batches_respect_limits(max_tokens: int, max_size: int, sized: Callable):
+    docs = sized(1, 2, 3, 4, 5, 6, 1, 2, 3)
+    batches = Chunkinator.BinPack(docs, embedding(max_tokens, max_size)).chunk()
+    assert all(len(batch) <= max_size for batch in batches)
+    assert all(sum(counts) <= max_tokens for counts in token_counts(batches))
+    assert sorted(sum(token_counts(batches), [])) == sorted(document.metadata['tokens'] for document in docs)
+
+def test_batch_size_limit_splits_small_documents(sized: Callable):
+    batches = Chunkinator.BinPack(sized(1, 1, 1, 1, 1), embedding(100, 2)).chunk()
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+
+def test_oversized_document_gets_its_own_batch(sized: Callable):
+    batches = Chunkinator.BinPack(sized(2, 20, 3), embedding(10, 10)).chunk()
+    assert token_counts(batches) == [[20], [3, 2]]
+
+def test_no_documents():
+    assert Chunkinator.BinPack([], embedding(10, 10)).chunk() == []
\ No newline at end of file
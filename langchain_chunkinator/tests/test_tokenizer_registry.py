@@ -0,0 +1,24 @@
+import pytest
+from pathlib import Path
+from orchestrators.chat.langchain_chunkinator.tokenizer_registry import TokenizerRegistry
+
+_local_tokenizer = Path(__file__).parents[2] / 'langchain_chat' / 'llm_models' / 'local_tokenizer'
+
+@pytest.fixture
+def registry() -> TokenizerRegistry:
+    return TokenizerRegistry()
+
+def test_warm_skips_missing_directory(registry: TokenizerRegistry, tmp_path: Path):
+    assert registry.warm([str(tmp_path / 'missing')]) == []
+    assert len(registry) == 0
+
+def test_warm_skips_empty_directory(registry: TokenizerRegistry, tmp_path: Path):
+    assert registry.warm([str(tmp_path)]) == []
+    assert str(tmp_path) not in registry
+
+def test_warm_skips_config_only_directory(registry: TokenizerRegistry):
+    config_only = _local_tokenizer / 'Llama-Guard-3-8B'
+    loadable = _local_tokenizer / 'Mistral-7B-Instruct-v0.3'
+    assert registry.warm([str(config_only), str(loadable)]) == [str(loadable)]
+    assert str(config_only) not in registry
+    assert str(loadable) in registry
@@ -0,0 +1,67 @@
+import os
+import gc
+import logging
+import threading
+from typing import Dict, Iterable, List
+from transformers import AutoTokenizer, PreTrainedTokenizerBase
+
+class TokenizerRegistry:
+    """
+    Process-wide registry of local tokenizers, keyed by directory
+
+    Each tokenizer is loaded once per process. Loading before the server forks its
+    workers (e.g. gunicorn --preload) lets workers share the tokenizers copy-on-write.
+    """
+    def __init__(self):
+        self._tokenizers: Dict[str, PreTrainedTokenizerBase] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def load(path: str) -> PreTrainedTokenizerBase:
+        """Load the tokenizer in `path`, the fast (Rust) implementation when the directory has one"""
+        return AutoTokenizer.from_pretrained(path)
+
+    def get(self, path: str) -> PreTrainedTokenizerBase:
+        """Return the tokenizer in `path`, loading it on first use"""
+        path = os.path.abspath(path)
+        if (tokenizer := self._tokenizers.get(path)) is not None:
+            return tokenizer
+
+        with self._lock:
+            if (tokenizer := self._tokenizers.get(path)) is None:
+                tokenizer = self.load(path)
+                self._tokenizers[path] = tokenizer
+        return tokenizer
+
+    def warm(self, paths: Iterable[str], freeze: bool = False) -> List[str]:
+        """
+        Load tokenizers ahead of the first request
+
+        Directories that do not exist are skipped, and those a tokenizer cannot be loaded from
+        (e.g. config files only) are logged and left to fail on first use instead of at startup.
+        With `freeze`, the loaded objects are moved out of the garbage collector's reach
+        so that collections in forked workers do not touch (and copy) their pages
+        """
+        warmed = []
+        for path in paths:
+            if not os.path.isdir(path):
+                continue
+            try:
+                self.get(path)
+            except Exception as e:
+                logging.warning(f'Skipping tokenizer warm-up for {path}: {e}')
+                continue
+            warmed.append(path)
+
+        if freeze:
+            gc.collect()
+            gc.freeze()
+        return warmed
+
+    def __contains__(self, path: str) -> bool:
+        return os.path.abspath(path) in self._tokenizers
+
+    def __len__(self) -> int:
+        return len(self._tokenizers)
+
+tokenizer_registry = TokenizerRegistry()
@@ -10,8 +10,14 @@ from .vector_stores import (
     create_filter_expression,
     AbstractVectorStore,
     AbstractVectorRetriever,
+    MultiSourceRetriever,
+    SemanticCache,
     STORE_FACTORIES,
     RETRIEVER_FACTORIES,
+    VECTOR_DELETERS,
+    aconnect_redis,
+    aclose_redis,
+    embedding_cache,
 )
 
 __all__ = [
@@ -22,6 +28,12 @@ __all__ = [
     'AbstractVectorStore',
     'create_filter_expression',
     'AbstractVectorRetriever',
+    'MultiSourceRetriever',
+    'SemanticCache',
     'STORE_FACTORIES',
     'RETRIEVER_FACTORIES',
+    'VECTOR_DELETERS',
+    'aconnect_redis',
+    'aclose_redis',
+    'embedding_cache',
 ]
\ No newline at end of file
@@ -0,0 +1,101 @@
+"""
+Compare recall, latency and memory of the vector datatypes on a local corpus
+
+Each datatype gets a temporary FLAT index in the Redis at REDIS_URL, loaded with the same
+vectors; recall@k is measured against exact FLOAT32 cosine search in numpy. The corpus is a
+.npy array of embeddings, e.g. exported from the embedding endpoint, or clustered random
+vectors when none is given. Run as a module of the application package, from the directory
+holding `orchestrators`:
+    python -m orchestrators.chat.langchain_doc.benchmarks.bench_vector_datatype --corpus embeddings.npy
+"""
+import os
+import time
+import argparse
+import numpy as np
+from redis import Redis
+from redis.commands.search.field import VectorField
+from redis.commands.search.indexDefinition import IndexDefinition, IndexType
+from redis.commands.search.query import Query
+from ..vector_stores import vector_codec as codec
+
+_DATATYPES = ['FLOAT32', 'FLOAT16']
+
+_PREFIX = 'bench_vector_datatype'
+
+def synthetic_corpus(n: int, dims: int, clusters: int = 50, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dims))
+    vectors = centers[rng.integers(clusters, size=n)] + 0.5 * rng.normal(size=(n, dims))
+    return vectors.astype(np.float32)
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def exact_neighbours(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = normalize(queries) @ normalize(corpus).T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+def load_index(client: Redis, datatype: str, corpus: np.ndarray) -> str:
+    name = f'{_PREFIX}_{datatype.lower()}'
+    prefix = f'{name}:'
+    client.ft(name).create_index(
+        [VectorField('embedding', 'FLAT', {'TYPE': datatype, 'DIM': corpus.shape[1], 'DISTANCE_METRIC': 'COSINE'})],
+        definition=IndexDefinition(prefix=[prefix], index_type=IndexType.HASH))
+
+    pipeline = client.pipeline(transaction=False)
+    for i, vector in enumerate(corpus):
+        pipeline.hset(f'{prefix}{i}', mapping={'embedding': codec.encode_vector(vector, datatype)})
+        if i % 1000 == 999:
+            pipeline.execute()
+    pipeline.execute()
+
+    while int(client.ft(name).info().get('indexing', 0)):
+        time.sleep(0.1)
+    return name
+
+def drop_index(client: Redis, name: str) -> None:
+    client.ft(name).dropindex(delete_documents=True)
+
+def search(client: Redis, name: str, datatype: str, queries: np.ndarray, k: int):
+    query = Query(f'*=>[KNN {k} @embedding $vector AS distance]').sort_by('distance').return_fields('distance').dialect(2)
+    neighbours, latencies = [], []
+    for vector in queries:
+        start = time.perf_counter()
+        results = client.ft(name).search(query, query_params={'vector': codec.encode_vector(vector, datatype)})
+        latencies.append(time.perf_counter() - start)
+        neighbours.append([int(document.id.rsplit(':', 1)[1]) for document in results.docs])
+    return neighbours, np.array(latencies)
+
+def recall(neighbours, exact: np.ndarray) -> float:
+    return float(np.mean([len(set(found) & set(truth)) / len(truth) for found, truth in zip(neighbours, exact)]))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', help='.npy array of embeddings, one row per chunk')
+    parser.add_argument('--size', type=int, default=20000, help='synthetic corpus size')
+    parser.add_argument('--dims', type=int, default=1024, help='synthetic corpus dimensions')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=4)
+    args = parser.parse_args()
+
+    corpus = np.load(args.corpus).astype(np.float32) if args.corpus else synthetic_corpus(args.size, args.dims)
+    rng = np.random.default_rng(1)
+    queries = corpus[rng.choice(len(corpus), size=args.queries, replace=False)]
+    queries = queries + 0.1 * rng.normal(size=queries.shape).astype(np.float32) * queries.std()
+    exact = exact_neighbours(corpus, queries, args.k)
+
+    client = Redis.from_url(os.environ['REDIS_URL'])
+    print(f'{len(corpus)} vectors of {corpus.shape[1]} dimensions, {len(queries)} queries, recall@{args.k}')
+    for datatype in _DATATYPES:
+        name = load_index(client, datatype, corpus)
+        try:
+            neighbours, latencies = search(client, name, datatype, queries, args.k)
+            memory = float(client.ft(name).info().get('vector_index_sz_mb', 0))
+        finally:
+            drop_index(client, name)
+        print(f'{datatype:<8} recall {recall(neighbours, exact):.3f}  '
+              f'p50 {np.percentile(latencies, 50) * 1e3:.2f} ms  p99 {np.percentile(latencies, 99) * 1e3:.2f} ms  '
+              f'index {memory:.1f} MB')
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -1,5 +1,6 @@
 from .embedding import BaseEmbedding
 from .factories import FACTORIES
 from .model_proxy import ModelProxy
+from .embedding_cache import EmbeddingCache, CachedEmbeddings
 
-__all__ = ['BaseEmbedding', 'FACTORIES', 'ModelProxy']
\ No newline at end of file
+__all__ = ['BaseEmbedding', 'FACTORIES', 'ModelProxy', 'EmbeddingCache', 'CachedEmbeddings']
\ No newline at end of file
@@ -0,0 +1,175 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, List, Optional, Tuple, Dict, Any
+import numpy as np
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from langchain_core.embeddings import Embeddings
+from ..logger import logger
+
+_CACHE_SIZE = int(os.getenv('EMBEDDING_CACHE_SIZE', 10000))
+
+_CACHE_TTL = int(os.getenv('EMBEDDING_CACHE_TTL', 3600 * 24 * 30))
+
+_KEY_PREFIX = 'embedding_cache'
+
+class EmbeddingCache:
+    """
+    Two-tier cache of embeddings keyed by (embedding model name, sha256(text))
+
+    An in-process LRU of float32 arrays sits in front of one Redis string of float32 bytes
+    per text, expiring on its own, so workers share what any of them embedded. Document
+    chunks skip the in-process tier, which holds the queries that repeat across requests.
+    The synchronous methods only consult the in-process tier.
+    """
+    def __init__(
+        self,
+        redis_client: Optional[Callable[[], Awaitable[Redis]]] = None,
+        maxsize: int = _CACHE_SIZE,
+        ttl_seconds: int = _CACHE_TTL,
+    ):
+        self.redis_client = redis_client
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._local: OrderedDict[Tuple[str, str], np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def digest(text: str) -> str:
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def redis_key(model_name: str, digest: str) -> str:
+        return f'{_KEY_PREFIX}:{model_name}:{digest}'
+
+    def _get_local(self, key: Tuple[str, str]) -> Optional[List[float]]:
+        with self._lock:
+            if (vector := self._local.get(key)) is None:
+                return None
+            self._local.move_to_end(key)
+        return vector.tolist()
+
+    def _put_local(self, key: Tuple[str, str], vector: List[float]) -> None:
+        array = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            self._local[key] = array
+            self._local.move_to_end(key)
+            while len(self._local) > self.maxsize:
+                self._local.popitem(last=False)
+
+    def _count(self, local_hits: int, redis_hits: int, misses: int) -> None:
+        with self._lock:
+            self.local_hits += local_hits
+            self.redis_hits += redis_hits
+            self.misses += misses
+
+    def get_many(self, model_name: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """Vectors from the in-process tier in order of `texts`, None where missing"""
+        vectors = [self._get_local((model_name, self.digest(text))) for text in texts]
+        misses = sum(1 for vector in vectors if vector is None)
+        self._count(len(texts) - misses, 0, misses)
+        return vectors
+
+    def put_many(self, model_name: str, texts: List[str], vectors: List[List[float]]) -> None:
+        for text, vector in zip(texts, vectors):
+            self._put_local((model_name, self.digest(text)), vector)
+
+    async def aget_many(self, model_name: str, texts: List[str], local: bool = True) -> List[Optional[List[float]]]:
+        """Cached vectors in order of `texts`, None where neither tier has one; `local` False leaves the in-process tier alone"""
+        digests = [self.digest(text) for text in texts]
+        vectors = [self._get_local((model_name, digest)) if local else None for digest in digests]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+
+        redis_hits = 0
+        if missing and self.redis_client is not None:
+            try:
+                values = await (await self.redis_client()).mget([self.redis_key(model_name, digests[i]) for i in missing])
+            except RedisError as e:
+                logger.warning(f'Embedding cache read failed: {e}')
+                values = [None] * len(missing)
+
+            for i, value in zip(missing, values):
+                if value is not None:
+                    vectors[i] = np.frombuffer(value, dtype=np.float32).tolist()
+                    if local:
+                        self._put_local((model_name, digests[i]), vectors[i])
+                    redis_hits += 1
+
+        self._count(len(texts) - len(missing), redis_hits, len(missing) - redis_hits)
+        stats = self.stats()
+        logger.info(f'Embedding cache {len(texts) - len(missing) + redis_hits} of {len(texts)} hits, '
+                    f'hit rate {stats["hit_rate"]:.1%} of {stats["lookups"]}, {stats["size"]} in process')
+        return vectors
+
+    async def aput_many(self, model_name: str, texts: List[str], vectors: List[List[float]], local: bool = True) -> None:
+        if local:
+            self.put_many(model_name, texts, vectors)
+        if self.redis_client is None or not texts:
+            return
+
+        try:
+            async with (await self.redis_client()).pipeline(transaction=False) as pipeline:
+                for text, vector in zip(texts, vectors):
+                    pipeline.set(
+                        self.redis_key(model_name, self.digest(text)),
+                        np.asarray(vector, dtype=np.float32).tobytes(),
+                        ex=self.ttl_seconds)
+                await pipeline.execute()
+        except RedisError as e:
+            logger.warning(f'Embedding cache write failed: {e}')
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit and miss counters since the process started"""
+        with self._lock:
+            lookups = self.local_hits + self.redis_hits + self.misses
+            return {
+                'local_hits': self.local_hits,
+                'redis_hits': self.redis_hits,
+                'misses': self.misses,
+                'lookups': lookups,
+                'hit_rate': (self.local_hits + self.redis_hits) / lookups if lookups else 0.0,
+                'size': len(self._local),
+            }
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings that consult an `EmbeddingCache` and only send cache misses to the model"""
+    def __init__(self, embeddings: Embeddings, model_name: str, cache: EmbeddingCache):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache = cache
+
+    def __getattr__(self, name: str) -> Any:
+        if name == 'embeddings':
+            raise AttributeError(name)
+        return getattr(self.embeddings, name)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # document chunks are only cached in Redis, which the synchronous path does not reach
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        if (vector := self.cache.get_many(self.model_name, [text])[0]) is None:
+            vector = self.embeddings.embed_query(text)
+            self.cache.put_many(self.model_name, [text], [vector])
+        return vector
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = await self.cache.aget_many(self.model_name, texts, local=False)
+        if missing := [i for i, vector in enumerate(vectors) if vector is None]:
+            missing_texts = [texts[i] for i in missing]
+            computed = await self.embeddings.aembed_documents(missing_texts)
+            await self.cache.aput_many(self.model_name, missing_texts, computed, local=False)
+            for i, vector in zip(missing, computed):
+                vectors[i] = vector
+        return vectors
+
+    async def aembed_query(self, text: str) -> List[float]:
+        if (vector := (await self.cache.aget_many(self.model_name, [text]))[0]) is None:
+            vector = await self.embeddings.aembed_query(text)
+            await self.cache.aput_many(self.model_name, [text], [vector])
+        return vector
\ No newline at end of file
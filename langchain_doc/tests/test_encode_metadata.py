@@ -0,0 +1,32 @@
+import pytest
+from bson import ObjectId
+from orchestrators.chat.langchain_doc.vector_stores.redis_vector_proxy import encode_metadata
+
+@pytest.fixture
+def metadata_schema() -> list:
+    return [
+        {'name': 'uuid', 'type': 'tag'},
+        {'name': 'conversation_id', 'type': 'tag'},
+        {'name': 'labels', 'type': 'tag', 'attrs': {'separator': '|'}},
+        {'name': 'page', 'type': 'numeric'},
+        {'name': 'source', 'type': 'text'},
+    ]
+
+def test_unindexed_and_none_values_are_dropped(metadata_schema: list):
+    fields = encode_metadata({'uuid': 'u1', 'source': None, 'extra': {'a': 1}}, metadata_schema)
+    assert fields == {'uuid': 'u1'}
+
+def test_values_are_encoded_by_field_type(metadata_schema: list):
+    conversation_id = ObjectId()
+    fields = encode_metadata({
+        'conversation_id': conversation_id,
+        'labels': ['a', 'b'],
+        'page': 3,
+        'source': {'file': 'notes.pdf'},
+    }, metadata_schema)
+    assert fields == {
+        'conversation_id': str(conversation_id),
+        'labels': 'a|b',
+        'page': 3,
+        'source': "{'file': 'notes.pdf'}",
+    }
@@ -0,0 +1,32 @@
+import pytest
+from typing import Callable
+from langchain_core.documents import Document
+from orchestrators.chat.langchain_doc.vector_stores.rank_fusion import reciprocal_rank_fusion
+
+@pytest.fixture
+def ranking(documents: Callable) -> Callable[..., list]:
+    return lambda *ids: documents('id', *ids)
+
+def ids(fused: list) -> list:
+    return [document.metadata['id'] for document in fused]
+
+def test_documents_in_both_rankings_rank_first(ranking: Callable):
+    vector, text = ranking('a', 'b', 'c'), ranking('d', 'c', 'e')
+    assert ids(reciprocal_rank_fusion([vector, text], k=5))[0] == 'c'
+
+def test_scores_sum_reciprocal_ranks(ranking: Callable):
+    # b: 1/(1+2) + 1/(1+1) beats a: 1/(1+1) and c: 1/(1+2)
+    fused = reciprocal_rank_fusion([ranking('a', 'b'), ranking('b', 'c')], k=3, rrf_k=1)
+    assert ids(fused) == ['b', 'a', 'c']
+
+@pytest.mark.parametrize('k, expected', [(1, ['a']), (2, ['a', 'b']), (10, ['a', 'b', 'c'])])
+def test_top_k(k: int, expected: list, ranking: Callable):
+    assert ids(reciprocal_rank_fusion([ranking('a', 'b', 'c')], k=k)) == expected
+
+def test_first_ranking_supplies_the_document():
+    vector = [Document(page_content='from knn', metadata={'id': 'a'})]
+    text = [Document(page_content='from bm25', metadata={'id': 'a'})]
+    assert reciprocal_rank_fusion([vector, text], k=1)[0].page_content == 'from knn'
+
+def test_empty_rankings():
+    assert reciprocal_rank_fusion([[], []], k=4) == []
\ No newline at end of file
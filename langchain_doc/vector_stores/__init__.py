@@ -1,11 +1,20 @@
 from .abstract_vector_store import AbstractVectorStore, create_filter_expression
 from .abstract_vector_retriever import AbstractVectorRetriever
-from .factories import STORE_FACTORIES, RETRIEVER_FACTORIES
+from .multi_source_retriever import MultiSourceRetriever
+from .semantic_cache import SemanticCache
+from .factories import STORE_FACTORIES, RETRIEVER_FACTORIES, VECTOR_DELETERS
+from .redis_vector_proxy import aconnect_redis, aclose_redis, embedding_cache
 
 __all__ = [
     'AbstractVectorStore', 
     'create_filter_expression',
     'AbstractVectorRetriever',
+    'MultiSourceRetriever',
+    'SemanticCache',
     'STORE_FACTORIES',
     'RETRIEVER_FACTORIES',
+    'VECTOR_DELETERS',
+    'aconnect_redis',
+    'aclose_redis',
+    'embedding_cache',
 ]
\ No newline at end of file
@@ -1,4 +1,4 @@
-from typing import List, TypedDict, Iterator
+from typing import List, TypedDict, Iterator, Dict, Any, Optional
 from functools import reduce
 import operator
 from abc import ABC, abstractmethod
@@ -25,6 +25,21 @@ def create_filter_expression(
     return filter_expression
 
 class AbstractVectorStore(ABC):    
+    @property
+    @abstractmethod
+    def ttl_seconds(self) -> int:
+        """Seconds ingested vectors live before they expire"""
+        pass
+
+    def shard_for(self, metadata: Dict[str, Any]) -> Optional[str]:
+        """Partition holding the vectors of `metadata`, None for stores without sharding"""
+        return None
+
+    @property
+    def semantic_cache(self) -> Optional[Any]:
+        """Cache of answers by question similarity, None for stores without one"""
+        return None
+
     @abstractmethod
     async def aadd(self, documents: Iterator[Document]) -> List[str]:
         pass
@@ -33,7 +48,66 @@ class AbstractVectorStore(ABC):
     async def asimilarity_search(
         self, 
         query: str, 
-        filter: FilterExpression = None
+        filter: FilterExpression = None,
+        k: int = 4,
+        shard: Optional[str] = None,
+    ) -> List[Document]:
+        pass
+
+    @abstractmethod
+    async def aembed_query(self, query: str) -> List[float]:
+        """Embed a query once so several searches can share the vector"""
+        pass
+
+    @abstractmethod
+    def embed_query(self, query: str) -> List[float]:
+        pass
+
+    @abstractmethod
+    async def asimilarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: FilterExpression = None,
+        shard: Optional[str] = None,
+    ) -> List[Document]:
+        pass
+
+    @abstractmethod
+    def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: FilterExpression = None,
+        shard: Optional[str] = None,
+    ) -> List[Document]:
+        pass
+
+    @abstractmethod
+    async def acount(self, filter: FilterExpression = None, shard: Optional[str] = None) -> int:
+        """Number of documents matching the filter"""
+        pass
+
+    @abstractmethod
+    async def ahybrid_search_by_vector(
+        self,
+        query: str,
+        embedding: List[float],
+        k: int = 4,
+        filter: FilterExpression = None,
+        shard: Optional[str] = None,
+    ) -> List[Document]:
+        """Full-text and vector results of the query, fused into one ranking"""
+        pass
+
+    @abstractmethod
+    def hybrid_search_by_vector(
+        self,
+        query: str,
+        embedding: List[float],
+        k: int = 4,
+        filter: FilterExpression = None,
+        shard: Optional[str] = None,
     ) -> List[Document]:
         pass
 
@@ -41,7 +115,8 @@ class AbstractVectorStore(ABC):
     async def adelete(
         self, 
         query: str = '', 
-        filter: FilterExpression = None
+        filter: FilterExpression = None,
+        shard: Optional[str] = None,
     ) -> bool:
         pass
 
@@ -50,7 +125,8 @@ class AbstractVectorStore(ABC):
         self, 
         query: str,
         k: int = 4,
-        filter: FilterExpression = None
+        filter: FilterExpression = None,
+        shard: Optional[str] = None,
     ) -> str:
         """Inspect a query"""
         pass
\ No newline at end of file
@@ -1,10 +1,14 @@
-from .redis_vector_proxy import create_redis_vector_proxy
+from .redis_vector_proxy import create_redis_vector_proxy, adelete_conversation_vectors
 from .redis_vector_retriever import RedisVectorRetriever
 
 STORE_FACTORIES = {
     'redis': create_redis_vector_proxy,
 }
 
+VECTOR_DELETERS = {
+    'redis': adelete_conversation_vectors,
+}
+
 RETRIEVER_FACTORIES = {
     'redis': RedisVectorRetriever,
 }
\ No newline at end of file
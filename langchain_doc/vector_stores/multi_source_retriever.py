@@ -0,0 +1,110 @@
+import os
+import asyncio
+import operator
+from functools import reduce
+from typing import List, Dict, Self
+from pydantic import BaseModel, Field, model_validator
+from redisvl.query.filter import FilterExpression
+from langchain_core.documents import Document
+from langchain_core.runnables import Runnable, RunnableLambda
+from .abstract_vector_retriever import AbstractVectorRetriever
+
+_SINGLE_QUERY = os.getenv('MULTI_SOURCE_SINGLE_QUERY', 'false').lower() == 'true'
+
+class MultiSourceRetriever(BaseModel):
+    """
+    Retrieve from several sources with one query embedding
+
+    Each source keeps its own filtered KNN search, issued concurrently (one after the other
+    when invoked synchronously). With `single_query`,
+    the sources are searched in one KNN query over the OR of their filters and the results
+    are split per source, which trades exact per-source top k for a single round trip; it
+    only applies when every source lives in the same shard and searches by similarity.
+    """
+    source_retrievers: List[AbstractVectorRetriever] = Field(description='Retrievers sharing one vector store')
+    single_query: bool = Field(description='Search all sources in one OR-filtered query', default=_SINGLE_QUERY)
+    retriever: Runnable = Field(description='Runnable mapping a query to documents per source', default=None)
+    tags: List[str] = Field(description='Tags to attach to Runnable', default=['redis', 'vectorstore', 'retriever'])
+
+    @model_validator(mode='after')
+    def load_retriever(self) -> Self:
+        self.retriever = RunnableLambda(self._retrieve, afunc=self._aretrieve).with_config(
+            run_name='multi_source_retriever',
+            tags=self.tags,
+        )
+        return self
+
+    @staticmethod
+    def key(source_retriever: AbstractVectorRetriever) -> str:
+        return f'Source {source_retriever.source}'
+
+    @property
+    def use_single_query(self) -> bool:
+        return (
+            self.single_query
+            and len({source_retriever.shard for source_retriever in self.source_retrievers}) == 1
+            and all(source_retriever.search_type != 'hybrid' for source_retriever in self.source_retrievers)
+        )
+
+    @property
+    def single_query_filter(self) -> FilterExpression:
+        return reduce(operator.or_, (source_retriever.filter for source_retriever in self.source_retrievers))
+
+    def split_by_source(self, documents: List[Document]) -> Dict[str, List[Document]]:
+        """Results of the single query, up to k per source"""
+        return {
+            self.key(source_retriever): [
+                document for document in documents
+                if document.metadata.get('source') == source_retriever.source
+            ][:source_retriever.k]
+            for source_retriever in self.source_retrievers
+        }
+
+    def _retrieve(self, query: str) -> Dict[str, List[Document]]:
+        vector_store_proxy = self.source_retrievers[0].vector_store_proxy
+        embedding = vector_store_proxy.embed_query(query)
+
+        if self.use_single_query:
+            return self.split_by_source(vector_store_proxy.similarity_search_by_vector(
+                embedding,
+                k=sum(source_retriever.k for source_retriever in self.source_retrievers),
+                filter=self.single_query_filter,
+                shard=self.source_retrievers[0].shard))
+
+        return {
+            self.key(source_retriever): (
+                vector_store_proxy.hybrid_search_by_vector(
+                    query, embedding, k=source_retriever.k, filter=source_retriever.filter, shard=source_retriever.shard)
+                if source_retriever.search_type == 'hybrid' else
+                vector_store_proxy.similarity_search_by_vector(
+                    embedding, k=source_retriever.k, filter=source_retriever.filter, shard=source_retriever.shard)
+            )
+            for source_retriever in self.source_retrievers
+        }
+
+    async def _aretrieve(self, query: str) -> Dict[str, List[Document]]:
+        vector_store_proxy = self.source_retrievers[0].vector_store_proxy
+        embedding = await vector_store_proxy.aembed_query(query)
+
+        if self.use_single_query:
+            return self.split_by_source(await vector_store_proxy.asimilarity_search_by_vector(
+                embedding,
+                k=sum(source_retriever.k for source_retriever in self.source_retrievers),
+                filter=self.single_query_filter,
+                shard=self.source_retrievers[0].shard))
+
+        results = await asyncio.gather(*(
+            vector_store_proxy.ahybrid_search_by_vector(
+                query, embedding, k=source_retriever.k, filter=source_retriever.filter, shard=source_retriever.shard)
+            if source_retriever.search_type == 'hybrid' else
+            vector_store_proxy.asimilarity_search_by_vector(
+                embedding, k=source_retriever.k, filter=source_retriever.filter, shard=source_retriever.shard)
+            for source_retriever in self.source_retrievers
+        ))
+        return {
+            self.key(source_retriever): documents
+            for source_retriever, documents in zip(self.source_retrievers, results)
+        }
+
+    class Config:
+        arbitrary_types_allowed = True
\ No newline at end of file
@@ -0,0 +1,18 @@
+from collections import defaultdict
+from typing import Dict, List, Sequence
+from langchain_core.documents import Document
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Document]], k: int, rrf_k: int = 60) -> List[Document]:
+    """
+    Top `k` documents of several rankings by the sum of 1 / (rrf_k + rank) over the rankings holding them
+
+    Documents are identified by `metadata['id']`; the first ranking to hold one supplies it.
+    """
+    scores: Dict[str, float] = defaultdict(float)
+    documents: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, document in enumerate(ranking, start=1):
+            scores[document.metadata['id']] += 1 / (rrf_k + rank)
+            documents.setdefault(document.metadata['id'], document)
+
+    return [documents[doc_id] for doc_id in sorted(scores, key=scores.get, reverse=True)[:k]]
\ No newline at end of file
@@ -1,9 +1,19 @@
 
 import os
+import re
+import zlib
+import uuid
 import asyncio
-from typing import List, Any, Iterator, Dict, Optional
+from collections import defaultdict
+from typing import List, Any, Iterator, Dict, Optional, Callable, Set
 from redis.client import Redis
 from redis.connection import ConnectionPool
+from redis.asyncio import Redis as AsyncRedis, ConnectionPool as AsyncConnectionPool
+from redis.commands.search.query import Query
+from redis.commands.search.result import Result
+from redisvl.query import VectorQuery
+from redisvl.schema import IndexSchema
+from redisvl.index import SearchIndex
 
 from langchain_core.documents import Document
 from langchain_redis import RedisConfig as Config
@@ -11,25 +21,85 @@ from langchain_redis.config import Redis
 from langchain_redis import RedisVectorStore
 
 from ..embedding_models.embedding import BaseEmbedding
+from ..embedding_models.embedding_cache import EmbeddingCache, CachedEmbeddings
 from .abstract_vector_store import (
     AbstractVectorStore, 
     FilterExpression,
 )
+from .vector_codec import VECTOR_DTYPES, encode_vector
+from .rank_fusion import reciprocal_rank_fusion
+from .semantic_cache import SemanticCache
+from ...langchain_chunkinator import Chunkinator
 from ..logger import logger
 
-_MAX_CONNECTIONS = 50
+# the asyncio pool serves searches and writes; the synchronous one manages the index and
+# serves the rare synchronous retriever call
+_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', 50))
 
-_SOCKET_TIMEOUT = 30.0
+_SYNC_MAX_CONNECTIONS = int(os.getenv('REDIS_SYNC_MAX_CONNECTIONS', 4))
+
+_SOCKET_TIMEOUT = float(os.getenv('REDIS_SOCKET_TIMEOUT', 30.0))
 
 _VECTOR_TTL_30_DAYS = 3600 * 24 * 30
 
-_INDEX_NAME = 'user_conversations'
+# the index created when missing; searches go through the alias when one is configured,
+# so `reindex` can build a new index beside it and swap the alias atomically
+_INDEX_NAME = os.getenv('REDIS_INDEX_NAME', 'user_conversations')
+
+_INDEX_ALIAS = os.getenv('REDIS_INDEX_ALIAS')
+
+# every index version covers the same keys
+_KEY_PREFIX = 'user_conversations'
 
 _DISTANCE_METRIC = 'COSINE'
 
-_INDEXING_ALGORITHM = 'FLAT'
+_INDEXING_ALGORITHM = os.getenv('REDIS_INDEXING_ALGORITHM', 'FLAT').upper()
+
+_HNSW_PARAMS = {
+    'm': int(os.getenv('REDIS_HNSW_M', 16)),
+    'ef_construction': int(os.getenv('REDIS_HNSW_EF_CONSTRUCTION', 200)),
+    'ef_runtime': int(os.getenv('REDIS_HNSW_EF_RUNTIME', 10)),
+}
+
+# FLOAT16 halves vector memory, see `benchmarks/bench_vector_datatype.py`
+# for the recall cost; like the algorithm it only applies when the index is created
+_VECTOR_DATATYPE = os.getenv('REDIS_VECTOR_DATATYPE', 'FLOAT32').upper()
+
+if _VECTOR_DATATYPE not in VECTOR_DTYPES:
+    raise ValueError(f'REDIS_VECTOR_DATATYPE must be one of {", ".join(VECTOR_DTYPES)}')
+
+# `tenant` gives every value of the shard key its own index, `hash` spreads them over
+# REDIS_SHARD_COUNT indexes; either way a query searches only the shard of its filter
+_SHARDING = os.getenv('REDIS_SHARDING', 'none').lower()
+
+_SHARD_KEY = os.getenv('REDIS_SHARD_KEY', 'uuid')
+
+_SHARD_COUNT = int(os.getenv('REDIS_SHARD_COUNT', 16))
+
+# hybrid search ranks the KNN and BM25 results with reciprocal rank fusion, each search
+# returning k * REDIS_HYBRID_OVERSAMPLE candidates
+_RRF_K = int(os.getenv('REDIS_RRF_K', 60))
+
+_HYBRID_OVERSAMPLE = int(os.getenv('REDIS_HYBRID_OVERSAMPLE', 4))
+
+# RediSearch splits indexed text on punctuation, so identifiers are queried by their parts
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+# RediSearch's default stopwords are never indexed, so they are dropped from the query too
+_STOPWORDS = frozenset((
+    'a', 'is', 'the', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'for', 'if', 'in',
+    'into', 'it', 'no', 'not', 'of', 'on', 'or', 'such', 'that', 'their', 'then', 'there',
+    'these', 'they', 'this', 'to', 'was', 'will', 'with',
+))
+
+# a long prompt would otherwise OR every word into the BM25 query
+_HYBRID_MAX_TERMS = int(os.getenv('REDIS_HYBRID_MAX_TERMS', 16))
 
-_VECTOR_DATATYPE = 'FLOAT32'
+# per-conversation set of the vector keys ingested into it, so deleting the conversation
+# removes them directly instead of leaving them in the index until their TTL
+_REGISTRY_PREFIX = 'vector_registry'
+
+_DELETE_BATCH = 1000
 
 _STORAGE_TYPE = 'hash'
 
@@ -37,6 +107,68 @@ _CONTENT_FIELD_NAME = 'text'
 
 _EMBEDDING_VECTOR_FIELD_NAME = 'embedding'
 
+def vector_index_schema(
+    name: str,
+    metadata_schema: List[Dict[str, Any]],
+    dimensions: int,
+    algorithm: str = _INDEXING_ALGORITHM,
+    datatype: str = _VECTOR_DATATYPE,
+    hnsw_params: Dict[str, int] = _HNSW_PARAMS,
+    prefix: str = _KEY_PREFIX,
+) -> Dict[str, Any]:
+    """Index schema in the dictionary form redisvl reads"""
+    attrs = {
+        'dims': dimensions,
+        'distance_metric': _DISTANCE_METRIC,
+        'algorithm': algorithm,
+        'datatype': datatype,
+    }
+    if algorithm == 'HNSW':
+        attrs.update(hnsw_params)
+
+    return {
+        'index': {
+            'name': name,
+            'prefix': prefix,
+            'storage_type': _STORAGE_TYPE,
+        },
+        'fields': [
+            {
+                'name': _CONTENT_FIELD_NAME,
+                'type': 'text'
+            },
+            {
+                'name': _EMBEDDING_VECTOR_FIELD_NAME,
+                'type': 'vector',
+                'attrs': attrs,
+            },
+            *metadata_schema,
+        ],
+    }
+
+def encode_metadata(metadata: Dict[str, Any], metadata_schema: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Hash fields of the metadata the index declares, encoded the way the index reads them
+
+    Tag lists are joined with the tag separator and other values are forced to str, as filters
+    compare them (e.g. BSON object ids); absent and None values are left out of the hash.
+    """
+    fields = {}
+    for field in metadata_schema:
+        if (value := metadata.get(field['name'])) is None:
+            continue
+        if field['type'] == 'tag' and isinstance(value, (list, tuple, set)):
+            separator = field.get('attrs', {}).get('separator', ',')
+            fields[field['name']] = separator.join(str(item) for item in value)
+        elif field['type'] == 'numeric' and isinstance(value, (int, float)):
+            fields[field['name']] = int(value) if isinstance(value, bool) else value
+        else:
+            fields[field['name']] = str(value)
+    return fields
+
+def vector_registry_key(conversation_id: str) -> str:
+    return f'{_REGISTRY_PREFIX}:{conversation_id}'
+
 class RedisVectorProxy(AbstractVectorStore):
     """
     Proxy to RedisVectorStore
@@ -46,27 +178,32 @@ class RedisVectorProxy(AbstractVectorStore):
     class MyRedisVectorStore(RedisVectorStore):
         async def aadd_documents_with_ttl(
             self, 
-            documents: Iterator[Document], 
+            batches: List[List[Document]], 
             ttl_seconds: int,
             max_requests: int,
+            redis_client: AsyncRedis,
+            key_prefix: Callable[[Dict[str, Any]], str],
+            registry_key: Callable[[Dict[str, Any]], Optional[str]],
+            hash_metadata: Callable[[Dict[str, Any]], Dict[str, Any]],
             **kwargs: Any) -> List[str]:
             """
+            Embed and store each batch as one request, at most `max_requests` in flight
+
             Example:
             > EXISTS user_conversations:a2c8a48073ee4a429b6910b1cfefb9f4
             (integer) 1
             > TTL user_conversations:a2c8a48073ee4a429b6910b1cfefb9f4
             (integer) 2591813
             """
-            redis_client = self.config.redis()
-
             semaphore = asyncio.Semaphore(max_requests)
 
-            async def process_document(document: Document):
+            async def process_batch(batch: List[Document]):
                 async with semaphore:
-                    batch_ids = await self._process_batch([document], ttl_seconds, redis_client, **kwargs)
+                    batch_ids = await self._process_batch(
+                        batch, ttl_seconds, redis_client, key_prefix, registry_key, hash_metadata, **kwargs)
                     return batch_ids
             
-            tasks = [asyncio.create_task(process_document(document)) for document in documents]
+            tasks = [asyncio.create_task(process_batch(batch)) for batch in batches]
             results = await asyncio.gather(*tasks)
             document_ids = [doc_id for batch_ids in results for doc_id in batch_ids]
 
@@ -76,22 +213,52 @@ class RedisVectorProxy(AbstractVectorStore):
             self, 
             batch: List[Document], 
             ttl_seconds: int, 
-            redis_client, 
+            redis_client: AsyncRedis, 
+            key_prefix: Callable[[Dict[str, Any]], str],
+            registry_key: Callable[[Dict[str, Any]], Optional[str]],
+            hash_metadata: Callable[[Dict[str, Any]], Dict[str, Any]],
             **kwargs: Any) -> List[str]:
-            batch_ids = await self.aadd_documents(batch, **kwargs)
-            for doc_id in batch_ids:
-                await asyncio.to_thread(redis_client.expire, doc_id, ttl_seconds)
+            """Embed the batch in one request, then write its hashes, registries and TTLs in one MULTI/EXEC"""
+            embeddings = await self.embeddings.aembed_documents([document.page_content for document in batch])
+            batch_ids = [f'{key_prefix(document.metadata)}:{uuid.uuid4().hex}' for document in batch]
+            registries = defaultdict(list)
+            for doc_id, document in zip(batch_ids, batch):
+                if (key := registry_key(document.metadata)) is not None:
+                    registries[key].append(doc_id)
+
+            async with redis_client.pipeline(transaction=True) as pipeline:
+                for doc_id, document, embedding in zip(batch_ids, batch, embeddings):
+                    pipeline.hset(doc_id, mapping={
+                        self.config.content_field: document.page_content,
+                        self.config.embedding_field: encode_vector(embedding, self.config.vector_datatype),
+                        **hash_metadata(document.metadata),
+                    })
+                    pipeline.expire(doc_id, ttl_seconds)
+                for key, doc_ids in registries.items():
+                    pipeline.sadd(key, *doc_ids)
+                    pipeline.expire(key, ttl_seconds)
+                await pipeline.execute()
 
             return batch_ids
 
-    def __init__(self, client: Redis, embeddings: BaseEmbedding, schema: List[Dict[str, Any]]):
+    def __init__(
+        self,
+        client: Redis,
+        async_client: AsyncRedis,
+        embeddings: BaseEmbedding,
+        schema: List[Dict[str, Any]],
+    ):
         self._client = client
+        self._async_client = async_client
         self.embeddings = embeddings
         self._schema = schema
+        self.embedding_cache = embedding_cache
+        self.index_schema = vector_index_schema(_INDEX_NAME, self._schema, self.embeddings.dimensions)
         self.config = Config(
             index_name=_INDEX_NAME,
+            key_prefix=_KEY_PREFIX,
             redis_client=self._client,
-            metadata_schema=self._schema,
+            index_schema=IndexSchema.from_dict(self.index_schema),
             distance_metric=_DISTANCE_METRIC,
             indexing_algorithm=_INDEXING_ALGORITHM,
             vector_datatype=_VECTOR_DATATYPE,
@@ -101,7 +268,14 @@ class RedisVectorProxy(AbstractVectorStore):
             embedding_dimensions=self.embeddings.dimensions,
         )
         self.vector_store = RedisVectorProxy.MyRedisVectorStore(
-            self.embeddings.endpoint_object, config=self.config)
+            self.cached_embeddings(), config=self.config)
+        self._shard_indexes: Set[str] = set()
+        self._shard_lock = asyncio.Lock()
+        self._semantic_cache: Optional[SemanticCache] = None
+
+    def cached_embeddings(self) -> CachedEmbeddings:
+        """The embedding endpoint behind the shared embedding cache"""
+        return CachedEmbeddings(self.embeddings.endpoint_object, self.embeddings.name, self.embedding_cache)
 
     @property
     def content_field_name(self) -> str:
@@ -118,34 +292,271 @@ class RedisVectorProxy(AbstractVectorStore):
         """Embedding Dimension count"""
         return self.config.embedding_dimensions
 
+    @property
+    def search_index_name(self) -> str:
+        """Alias when configured, otherwise the index itself"""
+        return _INDEX_ALIAS or self.config.index_name
+
+    def shard_for(self, metadata: Dict[str, Any]) -> Optional[str]:
+        """Shard holding the vectors of `metadata`, None when sharding is off or the shard key is absent"""
+        if _SHARDING == 'none' or (value := metadata.get(_SHARD_KEY)) is None:
+            return None
+        if _SHARDING == 'hash':
+            return f'h{zlib.crc32(str(value).encode('utf-8')) % _SHARD_COUNT:03d}'
+        return f't_{re.sub(r'[^0-9A-Za-z_-]', '_', str(value))}'
+
+    def shard_index_name(self, shard: Optional[str]) -> str:
+        return self.search_index_name if shard is None else f'{self.config.index_name}_{shard}'
+
+    def shard_key_prefix(self, shard: Optional[str]) -> str:
+        """Shard prefixes lead with the shard so they never fall under the unsharded index's prefix"""
+        return self.config.key_prefix if shard is None else f'{shard}:{self.config.key_prefix}'
+
+    def key_prefix(self, metadata: Dict[str, Any]) -> str:
+        return self.shard_key_prefix(self.shard_for(metadata))
+
+    def hash_metadata(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        return encode_metadata(metadata, self._schema)
+
+    def registry_key(self, metadata: Dict[str, Any]) -> Optional[str]:
+        conversation_id = metadata.get('conversation_id')
+        return None if conversation_id is None else vector_registry_key(str(conversation_id))
+
+    def _create_shard_index(self, shard: str) -> None:
+        schema = vector_index_schema(
+            self.shard_index_name(shard),
+            self._schema,
+            self.embeddings.dimensions,
+            prefix=self.shard_key_prefix(shard))
+        index = SearchIndex.from_dict(schema)
+        index.set_client(self._client)
+        index.create(overwrite=False)
+        self._shard_indexes.add(shard)
+
+    async def aensure_shard_index(self, shard: Optional[str]) -> None:
+        """Create a shard's index the first time this process writes to or searches it"""
+        if shard is None or shard in self._shard_indexes:
+            return
+
+        async with self._shard_lock:
+            if shard not in self._shard_indexes:
+                await asyncio.to_thread(self._create_shard_index, shard)
+
+    def ensure_shard_index(self, shard: Optional[str]) -> None:
+        if shard is not None and shard not in self._shard_indexes:
+            self._create_shard_index(shard)
+
+    @property
+    def semantic_cache(self) -> SemanticCache:
+        """Answer cache in its own index, sharing this store's connections and embeddings"""
+        if self._semantic_cache is None:
+            self._semantic_cache = SemanticCache(
+                self._client,
+                self._async_client,
+                self.aembed_query,
+                vector_index_schema,
+                self.embeddings.dimensions,
+                self.config.vector_datatype)
+        return self._semantic_cache
+
+    @property
+    def ttl_seconds(self) -> int:
+        """Seconds ingested vectors live before they expire"""
+        return _VECTOR_TTL_30_DAYS
+
     def update_embedding_token(self, new_token: str) -> None:
         self.embeddings.update_token(new_token)
         self.vector_store = RedisVectorProxy.MyRedisVectorStore(
-                self.embeddings.endpoint_object, config=self.config)
+                self.cached_embeddings(), config=self.config)
 
     async def aadd(self, documents: Iterator[Document]) -> List[str]:
         """Add documents to the vector store asynchronously, expecting metadata per document"""
-        return await self.vector_store.aadd_documents_with_ttl(documents, _VECTOR_TTL_30_DAYS, self.embeddings.max_batch_requests)
+        batches = await asyncio.to_thread(
+            lambda: Chunkinator.BinPack(list(documents), self.embeddings).chunk())
+        logger.info(f'Embedding {sum(len(batch) for batch in batches)} chunks in {len(batches)} batches')
+        for shard in {self.shard_for(document.metadata) for batch in batches for document in batch}:
+            await self.aensure_shard_index(shard)
+        return await self.vector_store.aadd_documents_with_ttl(
+            batches, _VECTOR_TTL_30_DAYS, self.embeddings.max_batch_requests, self._async_client,
+            self.key_prefix, self.registry_key, self.hash_metadata)
     
     async def asimilarity_search(
         self, 
         query: str,
-        filter: FilterExpression = None
+        filter: FilterExpression = None,
+        k: int = 4,
+        shard: Optional[str] = None,
     ) -> List[Document]:
         """Use Async Cosine Similarity Search to get immediate results"""
-        return await self.vector_store.asimilarity_search(query, filter=filter)
+        return await self.asimilarity_search_by_vector(await self.aembed_query(query), k=k, filter=filter, shard=shard)
     
+    async def aembed_query(self, query: str) -> List[float]:
+        return await self.vector_store.embeddings.aembed_query(query)
+
+    def embed_query(self, query: str) -> List[float]:
+        return self.vector_store.embeddings.embed_query(query)
+
+    def _to_documents(self, results: Any) -> List[Document]:
+        metadata_fields = [field['name'] for field in self._schema]
+        return [
+            Document(
+                page_content=getattr(result, self.content_field_name),
+                metadata={
+                    'id': result.id,
+                    **{name: getattr(result, name) for name in metadata_fields if hasattr(result, name)},
+                })
+            for result in results.docs
+        ]
+
+    def _vector_query(self, embedding: List[float], k: int, filter: FilterExpression) -> VectorQuery:
+        return VectorQuery(
+            vector=encode_vector(embedding, self.config.vector_datatype),
+            vector_field_name=self.embedding_vector_field_name,
+            return_fields=[self.content_field_name, *[field['name'] for field in self._schema]],
+            filter_expression=filter,
+            dtype=self.config.vector_datatype.lower(),
+            num_results=k,
+        )
+
+    def _text_query(self, query: str, k: int, filter: FilterExpression) -> Optional[Query]:
+        """BM25 query of any query term in the content field, None when the query has no terms"""
+        terms = dict.fromkeys(
+            token for token in _TOKEN_PATTERN.findall(query.lower()) if token not in _STOPWORDS)
+        if not (tokens := list(terms)[:_HYBRID_MAX_TERMS]):
+            return None
+        text_query = f'@{self.content_field_name}:({" | ".join(tokens)})'
+        if filter is not None and str(filter) != '*':
+            text_query = f'({filter}) {text_query}'
+
+        return (
+            Query(text_query)
+            .scorer('BM25')
+            .return_fields(self.content_field_name, *[field['name'] for field in self._schema])
+            .paging(0, k)
+            .dialect(2)
+        )
+
+    async def asimilarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: FilterExpression = None,
+        shard: Optional[str] = None,
+    ) -> List[Document]:
+        """KNN search with a precomputed query vector, on the asyncio client"""
+        query = self._vector_query(embedding, k, filter)
+        await self.aensure_shard_index(shard)
+        results = await self._async_client.ft(self.shard_index_name(shard)).search(query, query_params=query.params)
+        return self._to_documents(results)
+
+    def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: FilterExpression = None,
+        shard: Optional[str] = None,
+    ) -> List[Document]:
+        """KNN search with a precomputed query vector, on the synchronous client"""
+        query = self._vector_query(embedding, k, filter)
+        self.ensure_shard_index(shard)
+        results = self._client.ft(self.shard_index_name(shard)).search(query, query_params=query.params)
+        return self._to_documents(results)
+
+    async def afull_text_search(
+        self,
+        query: str,
+        k: int = 4,
+        filter: FilterExpression = None,
+        shard: Optional[str] = None,
+    ) -> List[Document]:
+        """BM25 search of any query term in the content field, so exact identifiers match"""
+        if (search_query := self._text_query(query, k, filter)) is None:
+            return []
+        await self.aensure_shard_index(shard)
+        results = await self._async_client.ft(self.shard_index_name(shard)).search(search_query)
+        return self._to_documents(results)
+
+    def full_text_search(
+        self,
+        query: str,
+        k: int = 4,
+        filter: FilterExpression = None,
+        shard: Optional[str] = None,
+    ) -> List[Document]:
+        if (search_query := self._text_query(query, k, filter)) is None:
+            return []
+        self.ensure_shard_index(shard)
+        results = self._client.ft(self.shard_index_name(shard)).search(search_query)
+        return self._to_documents(results)
+
+    async def acount(self, filter: FilterExpression = None, shard: Optional[str] = None) -> int:
+        """Number of documents matching the filter, without fetching any"""
+        query = Query(str(filter) if filter is not None else '*').paging(0, 0).dialect(2)
+        await self.aensure_shard_index(shard)
+        results = await self._async_client.ft(self.shard_index_name(shard)).search(query)
+        return results.total
+
+    async def ahybrid_search_by_vector(
+        self,
+        query: str,
+        embedding: List[float],
+        k: int = 4,
+        filter: FilterExpression = None,
+        shard: Optional[str] = None,
+    ) -> List[Document]:
+        """KNN and BM25 searches queued in one pipeline round trip, merged by reciprocal rank fusion"""
+        candidates = k * _HYBRID_OVERSAMPLE
+        vector_query = self._vector_query(embedding, candidates, filter)
+        searches = [(vector_query, vector_query.params)]
+        if (text_query := self._text_query(query, candidates, filter)) is not None:
+            searches.append((text_query, None))
+
+        await self.aensure_shard_index(shard)
+        async with self._async_client.ft(self.shard_index_name(shard)).pipeline(transaction=False) as pipeline:
+            for search_query, query_params in searches:
+                await pipeline.search(search_query, query_params=query_params)
+            replies = await pipeline.execute()
+
+        # a pipeline returns raw FT.SEARCH replies; both queries return text fields only, no payloads or scores
+        rankings = [self._to_documents(Result(reply, True)) for reply in replies]
+        return reciprocal_rank_fusion(rankings, k, _RRF_K)
+
+    def hybrid_search_by_vector(
+        self,
+        query: str,
+        embedding: List[float],
+        k: int = 4,
+        filter: FilterExpression = None,
+        shard: Optional[str] = None,
+    ) -> List[Document]:
+        """KNN and BM25 searches issued one after the other, merged by reciprocal rank fusion"""
+        candidates = k * _HYBRID_OVERSAMPLE
+        rankings = [
+            self.similarity_search_by_vector(embedding, k=candidates, filter=filter, shard=shard),
+            self.full_text_search(query, k=candidates, filter=filter, shard=shard),
+        ]
+        return reciprocal_rank_fusion(rankings, k, _RRF_K)
+
+    async def ahybrid_search(
+        self,
+        query: str,
+        filter: FilterExpression = None,
+        k: int = 4,
+        shard: Optional[str] = None,
+    ) -> List[Document]:
+        return await self.ahybrid_search_by_vector(
+            query, await self.aembed_query(query), k=k, filter=filter, shard=shard)
+
     async def adelete(
         self, 
         query: str = '',
-        filter: FilterExpression = None
+        filter: FilterExpression = None,
+        shard: Optional[str] = None,
     ) -> bool:
-        documents = await self.vector_store.asimilarity_search(query=query, filter=filter)
+        documents = await self.asimilarity_search(query, filter=filter, shard=shard)
         document_ids = [doc.metadata['id'] for doc in documents]
         if document_ids:
-            result = self.vector_store.adelete(ids=document_ids)
-            if result:
-                return True
+            return await self._async_client.delete(*document_ids) > 0
         return False
     
     async def inspect(
@@ -153,14 +564,11 @@ class RedisVectorProxy(AbstractVectorStore):
         query: str, 
         k: int = 4,
         filter: FilterExpression = None,
+        shard: Optional[str] = None,
     ) -> str:
         from tabulate2 import tabulate
-        query_vector = await self.embeddings.endpoint_object.aembed_query(query)
-        results = await self.vector_store.asimilarity_search_by_vector(
-            embedding=query_vector,
-            k=k,
-            filter=filter,
-        )
+        query_vector = await self.aembed_query(query)
+        results = await self.asimilarity_search_by_vector(query_vector, k=k, filter=filter, shard=shard)
         table_data = []
         for result in results:
             table_data.append([result.page_content, result.metadata])
@@ -180,50 +588,84 @@ class RedisVectorProxy(AbstractVectorStore):
 
     def __str__(self):
         """Index Schema"""
-        return str({
-            'index': {
-                'name': self.config.index_name,
-                'prefix': self.config.key_prefix,
-                'storage_type': self.config.storage_type,
-            },
-            'fields': [
-                {
-                    'name': self.content_field_name,
-                    'type': 'text'
-                },
-                {
-                    'name': self.embedding_vector_field_name,
-                    'type': 'vector',
-                    'attrs': {
-                        'dims': self.config.embedding_dimensions,
-                        'distance_metric': self.config.distance_metric,
-                        'algorithm': self.config.indexing_algorithm,
-                        'datatype': self.config.vector_datatype,
-                    },
-                },
-                *self._schema,
-            ],
-        })
+        return str(self.index_schema)
 
 if not os.environ['REDIS_URL']:
     raise Exception('Missing `REDIS_URL` in environment, therefore, not trying to connect')
 
 _redis_client = Redis.from_pool(ConnectionPool.from_url(
     os.environ['REDIS_URL'], 
-    max_connections=_MAX_CONNECTIONS,
+    max_connections=_SYNC_MAX_CONNECTIONS,
     socket_timeout=_SOCKET_TIMEOUT))
 
+_async_redis_client: Optional[AsyncRedis] = None
+
+def sync_redis_client() -> Redis:
+    """Synchronous client of the process, for index management such as `reindex`"""
+    return _redis_client
+
+def vector_datatype() -> str:
+    """Datatype new indexes store their vectors as, from REDIS_VECTOR_DATATYPE"""
+    return _VECTOR_DATATYPE
+
 _redis_vector_instance: Optional[RedisVectorProxy] = None
 
+async def aconnect_redis() -> AsyncRedis:
+    """Create the asyncio connection pool, once per process from the application lifespan"""
+    global _async_redis_client
+
+    if _async_redis_client is None:
+        _async_redis_client = AsyncRedis.from_pool(AsyncConnectionPool.from_url(
+            os.environ['REDIS_URL'], 
+            max_connections=_MAX_CONNECTIONS,
+            socket_timeout=_SOCKET_TIMEOUT))
+    return _async_redis_client
+
+# shared by every proxy, so its counters cover the whole process
+embedding_cache = EmbeddingCache(aconnect_redis)
+
+async def aclose_redis() -> None:
+    global _async_redis_client, _redis_vector_instance
+
+    if _async_redis_client is not None:
+        await _async_redis_client.aclose()
+    _async_redis_client = None
+    _redis_vector_instance = None
+
+async def adelete_conversation_vectors(conversation_ids: List[str]) -> int:
+    """Delete every vector registered to the conversations, returning how many were removed"""
+    if _async_redis_client is None:
+        raise RuntimeError('Redis is not connected, `aconnect_redis` runs in the application lifespan')
+    if not conversation_ids:
+        return 0
+
+    registries = [vector_registry_key(str(conversation_id)) for conversation_id in conversation_ids]
+    async with _async_redis_client.pipeline(transaction=False) as pipeline:
+        for registry in registries:
+            pipeline.smembers(registry)
+        members = await pipeline.execute()
+
+    keys = [key for registered in members for key in registered]
+    async with _async_redis_client.pipeline(transaction=False) as pipeline:
+        for i in range(0, len(keys), _DELETE_BATCH):
+            pipeline.unlink(*keys[i:i + _DELETE_BATCH])
+        pipeline.unlink(*registries)
+        deleted = await pipeline.execute()
+    return sum(deleted[:-1])
+
 def create_redis_vector_proxy(
     vector_store_schema: List[Dict[str, Any]],
     embeddings: BaseEmbedding,
 ) -> RedisVectorProxy:
     global _redis_vector_instance
 
+    if _async_redis_client is None:
+        raise RuntimeError('Redis is not connected, `aconnect_redis` runs in the application lifespan')
+
     if _redis_vector_instance is None:
         _redis_vector_instance = RedisVectorProxy(
             client=_redis_client,
+            async_client=_async_redis_client,
             embeddings=embeddings,
             schema=vector_store_schema,
         )
@@ -1,30 +1,69 @@
-from typing import List, Self
-from pydantic import Field, model_validator
+import os
+from typing import List, Self, Any, Optional
+from pydantic import Field, model_validator, ConfigDict
 from redisvl.query.filter import FilterExpression
-from langchain_redis import RedisVectorStore
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
 from .abstract_vector_retriever import AbstractVectorRetriever
+from .abstract_vector_store import AbstractVectorStore
+
+# `similarity` for KNN only, `hybrid` to fuse KNN with BM25 full-text results
+_SEARCH_TYPE = os.getenv('VECTOR_SEARCH_TYPE', 'similarity')
+
+class ProxyRetriever(BaseRetriever):
+    """Retriever searching through the vector store proxy, on its asyncio client when invoked asynchronously"""
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vector_store_proxy: AbstractVectorStore
+    k: int
+    filter: FilterExpression
+    shard: Optional[str] = None
+    search_type: str = 'similarity'
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        embedding = self.vector_store_proxy.embed_query(query)
+        if self.search_type == 'hybrid':
+            return self.vector_store_proxy.hybrid_search_by_vector(
+                query, embedding, k=self.k, filter=self.filter, shard=self.shard)
+        return self.vector_store_proxy.similarity_search_by_vector(
+            embedding, k=self.k, filter=self.filter, shard=self.shard)
+
+    async def _aget_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: AsyncCallbackManagerForRetrieverRun,
+        **kwargs: Any,
+    ) -> List[Document]:
+        if self.search_type == 'hybrid':
+            return await self.vector_store_proxy.ahybrid_search_by_vector(
+                query, await self.vector_store_proxy.aembed_query(query), k=self.k, filter=self.filter, shard=self.shard)
+        return await self.vector_store_proxy.asimilarity_search(
+            query, filter=self.filter, k=self.k, shard=self.shard)
 
 class RedisVectorRetriever(AbstractVectorRetriever):
     filter: FilterExpression = Field(description='Filter expression for the retriever')
+    search_type: Optional[str] = Field(description='`similarity` for KNN, `hybrid` for KNN fused with BM25', default=_SEARCH_TYPE)
     tags: List[str] = Field(description='Tags to attach to Runnable', default=['redis', 'vectorstore', 'retriever'])
 
     @model_validator(mode='after')
     def load_retriever(self) -> Self:
-        vector_store: RedisVectorStore = self.vector_store_proxy.vector_store
         self.runnable_name = '_'.join([v for _, v in self.metadata.items()])
         self.source = next((v for k, v in self.metadata.items() if k == 'source'), None)
+        self.shard = self.vector_store_proxy.shard_for(self.metadata)
 
-        self.retriever = vector_store.as_retriever(
+        self.retriever = ProxyRetriever(
+            vector_store_proxy=self.vector_store_proxy,
+            k=self.k,
+            filter=self.filter,
+            shard=self.shard,
             search_type=self.search_type,
-            search_kwargs={
-                'k': self.k, 
-                'score_threshold': self.score_threshold, 
-                'filter': self.filter,                
-            }).with_config(
-                run_name=self.runnable_name,
-                tags=self.tags,
-                metadata=self.metadata,           
-            )
+        ).with_config(
+            run_name=self.runnable_name,
+            tags=self.tags,
+            metadata=self.metadata,           
+        )
             
         return self
     
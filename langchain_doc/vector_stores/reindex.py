@@ -0,0 +1,87 @@
+"""
+Online reindex of the vector store
+
+Builds a new index beside the live one over the same keys, waits for Redis to finish
+indexing the existing hashes, then atomically points the search alias at it. Run as a
+module of the application package, from the directory holding `orchestrators`, e.g. to
+move from FLAT to HNSW:
+
+    python -m orchestrators.chat.langchain_doc.vector_stores.reindex \\
+        --target user_conversations_hnsw --alias user_conversations_live \\
+        --dims 1024 --algorithm HNSW --m 16 --ef-construction 200 --ef-runtime 10
+
+then deploy with REDIS_INDEX_NAME=user_conversations_hnsw, REDIS_INDEX_ALIAS=user_conversations_live
+and REDIS_INDEXING_ALGORITHM=HNSW. Searches through the alias move to the new index the
+moment it is swapped.
+"""
+import os
+import json
+import time
+import argparse
+from typing import Any, Dict
+from redis.client import Redis
+from redisvl.index import SearchIndex
+from .redis_vector_proxy import vector_index_schema, sync_redis_client, vector_datatype
+from .vector_codec import VECTOR_DTYPES
+from ..logger import logger
+
+_POLL_SECONDS = 5.0
+
+def build_index(client: Redis, schema: Dict[str, Any]) -> SearchIndex:
+    """Create the index; Redis indexes existing hashes under its prefix in the background"""
+    index = SearchIndex.from_dict(schema)
+    index.set_client(client)
+    index.create(overwrite=False)
+    return index
+
+def wait_until_indexed(client: Redis, name: str, poll_seconds: float = _POLL_SECONDS) -> None:
+    while True:
+        info = client.ft(name).info()
+        percent_indexed = float(info.get('percent_indexed', 1))
+        if percent_indexed >= 1 and int(info.get('indexing', 0)) == 0:
+            logger.info(f'Index {name} built over {info.get("num_docs")} documents')
+            return
+        logger.info(f'Index {name} {percent_indexed:.1%} indexed')
+        time.sleep(poll_seconds)
+
+def swap_alias(client: Redis, alias: str, name: str) -> None:
+    """Point `alias` at `name`, creating it if needed, in one FT.ALIASUPDATE"""
+    client.ft(name).aliasupdate(alias)
+
+def drop_index(client: Redis, name: str) -> None:
+    """Drop an index, keeping the hashes it covered"""
+    client.ft(name).dropindex(delete_documents=False)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', required=True, help='name of the index to build')
+    parser.add_argument('--alias', required=True, help='alias searches go through')
+    parser.add_argument('--dims', required=True, type=int, help='embedding dimensions')
+    parser.add_argument('--algorithm', default='HNSW', choices=['FLAT', 'HNSW'])
+    parser.add_argument('--datatype', default=vector_datatype(), choices=list(VECTOR_DTYPES))
+    parser.add_argument('--m', type=int, default=16)
+    parser.add_argument('--ef-construction', type=int, default=200)
+    parser.add_argument('--ef-runtime', type=int, default=10)
+    parser.add_argument('--drop', help='index to drop after the swap, keeping its documents')
+    args = parser.parse_args()
+
+    schema = vector_index_schema(
+        args.target,
+        json.loads(os.environ['VECTOR_STORE_SCHEMA']),
+        args.dims,
+        algorithm=args.algorithm,
+        datatype=args.datatype,
+        hnsw_params={'m': args.m, 'ef_construction': args.ef_construction, 'ef_runtime': args.ef_runtime},
+    )
+    client = sync_redis_client()
+    build_index(client, schema)
+    wait_until_indexed(client, args.target)
+    swap_alias(client, args.alias, args.target)
+    logger.info(f'Alias {args.alias} now points at {args.target}')
+
+    if args.drop:
+        drop_index(client, args.drop)
+        logger.info(f'Dropped index {args.drop}')
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
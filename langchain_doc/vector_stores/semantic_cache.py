@@ -0,0 +1,131 @@
+import os
+import uuid
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from redis.client import Redis
+from redis.asyncio import Redis as AsyncRedis
+from redis.exceptions import RedisError
+from redisvl.index import SearchIndex
+from redisvl.query import VectorQuery
+from redisvl.query.filter import Tag
+from .vector_codec import encode_vector
+from ..logger import logger
+
+_INDEX_NAME = os.getenv('SEMANTIC_CACHE_INDEX', 'semantic_cache')
+
+# cosine similarity a cached question needs to answer a new one
+_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', 0.95))
+
+_CACHE_TTL = int(os.getenv('SEMANTIC_CACHE_TTL', 3600 * 24 * 7))
+
+_SCOPE_FIELD_NAME = 'scope'
+
+_ANSWER_FIELD_NAME = 'answer'
+
+class SemanticCache:
+    """
+    Answers to earlier questions, found by the similarity of a new question's embedding
+
+    Entries live in their own small FLAT index and are scoped by a hash of the source
+    documents, so an answer is only reused for questions about the same documents.
+    """
+    def __init__(
+        self,
+        client: Redis,
+        async_client: AsyncRedis,
+        aembed_query: Callable[[str], Awaitable[List[float]]],
+        index_schema: Callable[..., Dict[str, Any]],
+        dimensions: int,
+        datatype: str,
+        threshold: float = _THRESHOLD,
+        ttl_seconds: int = _CACHE_TTL,
+    ):
+        self._client = client
+        self._async_client = async_client
+        self.aembed_query = aembed_query
+        self.schema = index_schema(
+            _INDEX_NAME,
+            [{'name': _SCOPE_FIELD_NAME, 'type': 'tag'}],
+            dimensions,
+            algorithm='FLAT',
+            datatype=datatype,
+            prefix=_INDEX_NAME)
+        self.content_field_name = next(field['name'] for field in self.schema['fields'] if field['type'] == 'text')
+        self.embedding_field_name = next(field['name'] for field in self.schema['fields'] if field['type'] == 'vector')
+        self.datatype = datatype
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._index_created = False
+        self._lock = asyncio.Lock()
+
+    @property
+    def index_name(self) -> str:
+        return self.schema['index']['name']
+
+    async def aensure_index(self) -> None:
+        if self._index_created:
+            return
+
+        async with self._lock:
+            if self._index_created:
+                return
+            index = SearchIndex.from_dict(self.schema)
+            index.set_client(self._client)
+            await asyncio.to_thread(index.create, overwrite=False)
+            self._index_created = True
+
+    async def alookup(self, question: str, scope: str) -> Optional[str]:
+        """Answer of the most similar cached question in `scope`, None below the threshold"""
+        answer = None
+        try:
+            await self.aensure_index()
+            query = VectorQuery(
+                vector=encode_vector(await self.aembed_query(question), self.datatype),
+                vector_field_name=self.embedding_field_name,
+                return_fields=[_ANSWER_FIELD_NAME],
+                filter_expression=Tag(_SCOPE_FIELD_NAME) == scope,
+                dtype=self.datatype.lower(),
+                num_results=1,
+            )
+            results = await self._async_client.ft(self.index_name).search(query, query_params=query.params)
+            if results.docs and 1 - float(results.docs[0].vector_distance) >= self.threshold:
+                answer = results.docs[0].answer
+        except RedisError as e:
+            logger.warning(f'Semantic cache lookup failed: {e}')
+
+        if answer is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        stats = self.stats()
+        logger.info(f'Semantic cache {"hit" if answer is not None else "miss"}, hit rate {stats["hit_rate"]:.1%} of {stats["lookups"]}')
+        return answer
+
+    async def astore(self, question: str, scope: str, answer: str) -> None:
+        key = f'{_INDEX_NAME}:{uuid.uuid4().hex}'
+        try:
+            await self.aensure_index()
+            embedding = await self.aembed_query(question)
+            async with self._async_client.pipeline(transaction=True) as pipeline:
+                pipeline.hset(key, mapping={
+                    self.content_field_name: question,
+                    self.embedding_field_name: encode_vector(embedding, self.datatype),
+                    _SCOPE_FIELD_NAME: scope,
+                    _ANSWER_FIELD_NAME: answer,
+                })
+                pipeline.expire(key, self.ttl_seconds)
+                await pipeline.execute()
+        except RedisError as e:
+            logger.warning(f'Semantic cache write failed: {e}')
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit and miss counters since the process started"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'lookups': lookups,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
\ No newline at end of file
@@ -0,0 +1,13 @@
+from typing import Sequence
+import numpy as np
+
+# the vector datatypes redisvl 0.3.5 can declare in an index schema
+VECTOR_DTYPES = {
+    'FLOAT64': np.float64,
+    'FLOAT32': np.float32,
+    'FLOAT16': np.float16,
+}
+
+def encode_vector(vector: Sequence[float], datatype: str) -> bytes:
+    """Bytes of `vector` as an index of `datatype` stores and queries them"""
+    return np.asarray(vector, dtype=VECTOR_DTYPES[datatype]).tobytes()
\ No newline at end of file
@@ -1,3 +1,4 @@
 from .lexical_soup import LexicalSoup
+from .key_phrases import extract_title
 
-__all__ = ['LexicalSoup']
\ No newline at end of file
+__all__ = ['LexicalSoup', 'extract_title']
\ No newline at end of file
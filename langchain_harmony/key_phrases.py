@@ -0,0 +1,65 @@
+from typing import List, Dict, Tuple, Optional
+from collections import Counter
+from nltk.tokenize import word_tokenize
+from .nlp_functools import rm_stopwords, ngram_freqs, compute_tf
+
+_MIN_TOKEN_LENGTH = 3
+
+# content words in an exchange below which key phrases are not trusted
+_MIN_CONTENT_TOKENS = 8
+
+_QUESTION_BOOST = 2.0
+
+_MAX_PHRASES = 3
+
+def _content_tokens(text: str) -> Tuple[List[str], Dict[str, str]]:
+    """Lowercased content words, and the most common original spelling of each"""
+    words = [word for word in word_tokenize(text) if word.isalpha() and len(word) >= _MIN_TOKEN_LENGTH]
+    spellings: Dict[str, Counter] = {}
+    for word in words:
+        spellings.setdefault(word.lower(), Counter())[word] += 1
+    tokens = rm_stopwords([word.lower() for word in words])
+    return tokens, {token: counts.most_common(1)[0][0] for token, counts in spellings.items()}
+
+def extract_title(question: str, answer: str, max_words: int = 5) -> Tuple[Optional[str], float]:
+    """
+    Title an exchange with its key phrases, without a model
+
+    Terms are ranked by frequency across the exchange, boosted when the question asks about
+    them, and frequent bigrams are kept together. Confidence is the share of title words the
+    question and answer have in common, scaled down for exchanges too short to rank.
+    """
+    question_tokens, question_spellings = _content_tokens(question)
+    answer_tokens, answer_spellings = _content_tokens(answer)
+    document = question_tokens + answer_tokens
+    if not document:
+        return None, 0.0
+
+    spellings = {**answer_spellings, **question_spellings}
+    question_terms, answer_terms = set(question_tokens), set(answer_tokens)
+
+    # term frequency alone: `compute_tf_idf` needs a corpus of other documents, and idf over the
+    # exchange's own sentences would demote the very terms that recur because they are the topic
+    def score(term: str) -> float:
+        return compute_tf(term, document) * (_QUESTION_BOOST if term in question_terms else 1.0)
+
+    candidates: Dict[tuple, float] = {(term,): score(term) for term in set(document)}
+    bigrams = ngram_freqs(question_tokens, 2) + ngram_freqs(answer_tokens, 2)
+    for bigram, count in bigrams.items():
+        if bigram[0] != bigram[1] and (count > 1 or set(bigram) <= question_terms):
+            candidates[bigram] = count * sum(score(term) for term in bigram)
+
+    title_terms: List[str] = []
+    phrases = 0
+    for phrase, _ in sorted(candidates.items(), key=lambda item: (item[1], item[0]), reverse=True):
+        new_terms = [term for term in phrase if term not in title_terms]
+        if not new_terms or len(title_terms) + len(new_terms) > max_words:
+            continue
+        title_terms.extend(new_terms)
+        if (phrases := phrases + 1) == _MAX_PHRASES:
+            break
+
+    shared = sum(1 for term in title_terms if term in question_terms and term in answer_terms)
+    confidence = shared / len(title_terms) * min(1.0, len(document) / _MIN_CONTENT_TOKENS)
+    title = ' '.join(spellings[term][:1].upper() + spellings[term][1:] for term in title_terms)
+    return title, confidence
\ No newline at end of file
@@ -1,29 +1,67 @@
 import os
+import asyncio
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
+from motor.motor_asyncio import AsyncIOMotorCollection
+from redis.exceptions import LockError
 from .clients.mongo_strategy import mongo_instance as database_instance
+from .langchain_chat import llm_pool, summary_runner, title_runner
+from .langchain_chat.messages import MyMongoDBChatMessageHistory
+from .langchain_doc import aconnect_redis, aclose_redis
+from .langchain_chunkinator import tokenizer_registry
+from .routes.configs import local_tokenizer_paths
 from .routes.home import router as home_router
 from .routes.conversations import router as conversations_router
 from .routes.messages import router as messages_router
 from .routes.settings import router as settings_router
+from .routes.caches import router as caches_router
 from .routes.default import router as default_router
 from .middleware import (
     MultiAuthorizationMiddleware, AddAuthorizationHeaderMiddleware)
+from .logger import logger
 
 load_dotenv()
 
+# load tokenizers in the parent process so forked workers (gunicorn --preload) share them copy-on-write
+if os.getenv('PRELOAD_TOKENIZERS', 'false').lower() == 'true':
+    tokenizer_registry.warm(local_tokenizer_paths(), freeze=True)
+
+_MIGRATION_LOCK = 'message_history_migration'
+
+# a lock left by a worker that died mid-migration expires, then the next startup resumes it
+_MIGRATION_LOCK_SECONDS = int(os.getenv('MIGRATION_LOCK_SECONDS', 3600))
+
+async def amigrate_message_history(messages: AsyncIOMotorCollection) -> None:
+    """Migrate legacy message documents in the one worker that takes the migration lock"""
+    lock = (await aconnect_redis()).lock(_MIGRATION_LOCK, timeout=_MIGRATION_LOCK_SECONDS)
+    if not await lock.acquire(blocking=False):
+        logger.info('Message history migration is running in another worker')
+        return
+
+    try:
+        migrated = await MyMongoDBChatMessageHistory.amigrate(messages)
+        logger.info(f'Message history migration finished, {migrated} documents migrated')
+    except Exception as e:
+        logger.error(f'Message history migration failed: {e}', exc_info=True)
+    finally:
+        try:
+            await lock.release()
+        except LockError:
+            logger.warning('Message history migration lock expired before the migration ended')
+
 @asynccontextmanager
 async def lifespan(_: FastAPI):
     try:
         from pymongo import ASCENDING, DESCENDING
         await database_instance.connect()
         db = database_instance.get_database()
+        messages = db[database_instance.message_history_collection]
  
-        await db.collection.create_index(
+        await messages.create_index(
             [
                 ('type', ASCENDING),
                 ('content', ASCENDING),
@@ -32,7 +70,7 @@ async def lifespan(_: FastAPI):
             name='type_content_conversation_id_index'
         )
 
-        await db.collection.create_index(
+        await messages.create_index(
             [
                 ('type', ASCENDING),
                 ('conversation_id', ASCENDING),
@@ -40,11 +78,33 @@ async def lifespan(_: FastAPI):
             ],
             name='type_conversation_id_createdAt_index'
         )
+
+        await messages.create_index(
+            [
+                ('conversation_id', ASCENDING),
+                ('createdAt', DESCENDING),
+                ('_id', DESCENDING),
+            ],
+            name='conversation_id_createdAt_index'
+        )
         
     except Exception as e:
         raise RuntimeError(f'Database connection error {e}')
 
+    await aconnect_redis()
+    await asyncio.to_thread(tokenizer_registry.warm, local_tokenizer_paths())
+
+    migration = None
+    if os.getenv('MIGRATE_MESSAGE_HISTORY', 'false').lower() == 'true':
+        migration = asyncio.create_task(amigrate_message_history(messages))
+
     yield
+    if migration is not None and not migration.done():
+        migration.cancel()
+    await summary_runner.aclose()
+    await title_runner.aclose()
+    await llm_pool.aclose()
+    await aclose_redis()
     await database_instance.close()
 
 app = FastAPI(lifespan=lifespan)
@@ -103,4 +163,5 @@ app.include_router(home_router, prefix=_prefix)
 app.include_router(conversations_router, prefix=_prefix)
 app.include_router(messages_router, prefix=_prefix)
 app.include_router(settings_router, prefix=_prefix)
+app.include_router(caches_router, prefix=_prefix)
 app.include_router(default_router)
\ No newline at end of file
@@ -1,5 +1,10 @@
+import os
+from datetime import datetime
 from typing import Dict, Any, Optional, List
 from pydantic import BaseModel
+from redis.exceptions import RedisError
+from ..langchain_doc import VECTOR_DELETERS
+from ..logger import logger
 from ..models.mongo_schema import ObjectId
 from ..models.conversation import (
     Conversation, 
@@ -45,6 +50,16 @@ _PROJECT = {
                 }
             }
 
+async def _adelete_vectors(conversation_ids: List[ObjectId]) -> None:
+    """Remove the conversations' vectors now rather than at their TTL; the TTL stays the fallback"""
+    if (deleter := VECTOR_DELETERS.get(os.getenv('VECTOR_STORE'))) is None:
+        return
+    try:
+        deleted = await deleter([str(conversation_id) for conversation_id in conversation_ids])
+        logger.info(f'Deleted {deleted} vectors of {len(conversation_ids)} conversations')
+    except RedisError as e:
+        logger.warning(f'Vector cleanup failed, vectors expire with their TTL: {e}')
+
 class ConversationMongoRepository(factory(Conversation)):
     @classmethod
     async def all(
@@ -82,6 +97,26 @@ class ConversationMongoRepository(factory(Conversation)):
         result = await cls.get_collection().aggregate(stages).to_list(length=None)
         return result and result[0]
     
+    @classmethod
+    async def record_vectors(cls, id: str, *, sources: List[str], digests: List[str], expire_at: datetime) -> None:
+        """Record the sources ingested into the conversation's vectors and their content digests"""
+        await cls.get_collection().update_one(
+            { '_id': ObjectId(id) },
+            {
+                '$addToSet': {
+                    'vector_sources': { '$each': sources },
+                    'source_digests': { '$each': digests },
+                },
+                '$set': { 'vectors_expire_at': expire_at },
+            })
+
+    @classmethod
+    async def delete(cls, id: str, *, options: Optional[dict] = {}) -> int:
+        deleted_count = await super().delete(id, options=options)
+        if deleted_count > 0:
+            await _adelete_vectors([ObjectId(id)])
+        return deleted_count
+
     @classmethod
     async def delete_many(cls, *, options: dict) -> int:
         conversations = await cls.find(options=options)
@@ -89,4 +124,5 @@ class ConversationMongoRepository(factory(Conversation)):
         deleted_count = await super().delete_many(options=options)
         if deleted_count > 0:
             await MessageRepo.delete_many(options={'conversation_id': {'$in': conversation_ids}})
+            await _adelete_vectors(conversation_ids)
         return deleted_count
\ No newline at end of file
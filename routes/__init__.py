@@ -2,6 +2,7 @@ from .home import router as home_router
 from .conversations import router as conversations_router
 from .messages import router as messages_router
 from .settings import router as settings_router
+from .caches import router as caches_router
 from .default import router as default_router
 from .chats import chat
 from .configs import (
@@ -14,6 +15,7 @@ __all__ = [
     'conversations_router',
     'messages_router',
     'settings_router',
+    'caches_router',
     'default_router',
     'chat',
     'refresh_model_configs',
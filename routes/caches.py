@@ -0,0 +1,23 @@
+from typing import Dict, Any
+from fastapi import APIRouter, Depends
+from ..auth.bearer_authentication import get_current_user
+from ..langchain_chat import verdict_cache, response_cache
+from ..langchain_doc import embedding_cache
+
+router = APIRouter(
+    prefix='/caches',
+    tags=['cache'],
+    dependencies=[Depends(get_current_user)],
+)
+
+@router.get(
+    '/stats',
+    response_description='Hit and miss counters of the caches of the worker serving the request',
+)
+async def get_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Cache counters since the worker started; each worker counts its own lookups"""
+    return {
+        'embedding': embedding_cache.stats(),
+        'guardrail_verdict': verdict_cache.stats(),
+        'response': response_cache.stats(),
+    }
\ No newline at end of file
@@ -40,7 +40,8 @@ async def chat(
     builder.build_guardrails_part(guardrails)
     builder.build_prompt_part(user_prompt_template)
     builder.build_message_part({
-        'connection_string': database_instance.connection_string,
+        'client': database_instance.client,
+        'sync_client': database_instance.get_sync_client,
         'database_name': database_instance.name,
         'collection_name': database_instance.message_history_collection,
         'session_id_key': database_instance.message_history_key,
@@ -2,8 +2,9 @@ import os
 import json
 from typing import List, Dict, Optional
 from fastapi import Request, Depends, HTTPException
-from ..langchain_chat import LLM, FACTORIES as LLM_FACTORIES
+from ..langchain_chat import LLM, FACTORIES as LLM_FACTORIES, llm_pool, authorization_var
 from ..langchain_doc import FACTORIES as EMBEDDING_FACTORIES, BaseEmbedding
+from ..langchain_chunkinator import tokenizer_path as embedding_tokenizer_path
 from ..logger import logger
 from ..models.system_model_config import SystemModelConfigSchema
 from ..models.setting import Setting, SettingSchema
@@ -30,6 +31,19 @@ def load_system_model_config() -> Dict[str, SystemModelConfigSchema]:
     system_configs = {config['name']: SystemModelConfigSchema(**config) for config in model_dicts}
     return system_configs
 
+def local_tokenizer_paths() -> List[str]:
+    """Local tokenizer directories of the configured chat and embedding models"""
+    paths = [
+        LLM_FACTORIES['tgi'].tokenizer_path(name)
+        for name, config in load_system_model_config().items()
+        if any(endpoint['type'] == 'tgi' for endpoint in config.endpoints or [])
+    ]
+    paths += [
+        embedding_tokenizer_path(config['name'].split('/')[1])
+        for config in json.loads(os.environ['EMBEDDING_MODELS'])
+    ]
+    return paths
+
 async def get_active_model_config(
     setting_id: str, 
     configs: Dict[str, SystemModelConfigSchema], 
@@ -136,22 +150,20 @@ async def get_current_models(
     request: Request,
     system_model_config: SystemModelConfigSchema = Depends(refresh_model_configs)
 ) -> List[LLM]:
-    """Return the active model(s) of settings for current user"""
+    """Return the pooled active model(s) of settings for current user, bound to the request's bearer token"""
     logger.info(
         f'using Bearer {request.state.authorization} for '
         f'model config {system_model_config.name}'
     )
+    authorization_var.set(request.state.authorization)
     models = [
-        LLM_FACTORIES[endpoint['type']](**{
+        await llm_pool.aget(LLM_FACTORIES[endpoint['type']], **{
             'name': system_model_config.name,
             'description': system_model_config.description,
             'preprompt': system_model_config.preprompt,
             'classification': system_model_config.classification,
             'stream': system_model_config.stream,
             'parameters': dict(system_model_config.parameters),
-            'server_kwargs': { 
-                'headers': {'Authorization': f'Bearer {request.state.authorization}' }
-            },
             'endpoint': endpoint,
         })
         for endpoint in system_model_config.endpoints
@@ -1,10 +1,20 @@
 import os
 import time
+import hashlib
+import datetime as dt
 from typing import List, Tuple
 from fastapi import UploadFile
 from langchain_core.vectorstores import VectorStoreRetriever
 from ..langchain_doc import ingest, BaseEmbedding
 from ..logger import logger
+from ..repositories.conversation_mongo_repository import (
+    ConversationMongoRepository as ConversationRepo)
+
+def source_digest(upload_file: UploadFile) -> str:
+    """sha256 of an upload's content, leaving the file at its start for ingestion"""
+    digest = hashlib.file_digest(upload_file.file, 'sha256').hexdigest()
+    upload_file.file.seek(0)
+    return digest
 
 async def ingest_files(
     embedding_models: List[BaseEmbedding], 
@@ -14,13 +24,23 @@ async def ingest_files(
     if not (vector_store := os.getenv('VECTOR_STORE')):
         raise ValueError('Expected `REDIS_STORE` to be defined')
     
+    conversation_id = data['conversation_id']
     data = {
         **data,
-        'conversation_id': str(data['conversation_id']),
+        'conversation_id': str(conversation_id),
     }
+    digests = [source_digest(upload_file) for upload_file in upload_files]
     start_time = time.time()
     retrievers, filenames = await ingest(vector_store, upload_files, embedding_models, data)
     duration = time.time() - start_time
     logger.info(f'Ingestion time for {filenames}: {duration:.2f} seconds')
 
+    if retrievers:
+        ttl_seconds = retrievers[0].vector_store_proxy.ttl_seconds
+        await ConversationRepo.record_vectors(
+            conversation_id,
+            sources=filenames,
+            digests=digests,
+            expire_at=dt.datetime.now(dt.timezone.utc) + dt.timedelta(seconds=ttl_seconds))
+
     return retrievers, filenames
\ No newline at end of file